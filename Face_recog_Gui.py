@@ -1,32 +1,138 @@
-from picamera2 import Picamera2
-import face_recognition
-import pickle
 import cv2
 import time
-import numpy as np
-from ultralytics import YOLO
 import os
+import threading
 import current_user
+import user_events
+from frame_pipeline import LatestQueue, PipelineStage, StageStats, StageTimer
+from frame_source import EndOfStream, create_frame_source
+from face_matcher import FaceMatcher
+from face_encoder import encode_faces
+from face_gallery import Gallery, gallery_exists, gallery_paths, migrate_pickle
+from image_utils import letterbox, unletterbox_box, padded_crop
+from motion_gate import MotionGate
+from governor import FrameRateGovernor
+from face_tracker import FaceTracker, scene_thumbnail, scene_difference
+from face_prototypes import PrototypeIndex, build_prototypes, load_prototypes, save_prototypes
+from model_server import ModelClient
+from detector_backends import HaarDetector, TieredDetector, create_detector
+from recognition_cache import RecognitionCache
 
 # Configuration parameters - easier to adjust
 CONFIG = {
     "recognition_threshold": 0.55,  # Face recognition confidence threshold
+    "candidate_threshold": 0.65,    # Near matches below this distance are announced for prefetching
+    "candidate_interval": 10.0,     # Seconds before the same candidate is announced again
     "detection_confidence": 0.5,    # YOLO detection confidence threshold
     "face_model_path": "/home/tusharg/yolov8n-face.pt",
-    "encodings_file": "encodings.pickle",
+    "detector_backend": "ultralytics",  # ultralytics (PyTorch), onnx or onnx-int8 (see detector_backends.py)
+    "model_server": True,           # Use the warm model_server.py daemon when it is running
+    "model_server_socket": None,    # None for the default socket in the runtime directory
+    "gallery_file": "gallery",      # Memory-mapped gallery (gallery.json + gallery.<n>.f32)
+    "encodings_file": "encodings.pickle",  # Legacy pickle, migrated to the gallery once
+    "prototypes_file": "prototypes.pickle",  # Per-person centroid index built next to the encodings
+    "prototypes_per_person": 8,     # Centroids kept for each enrolled person
+    "prototype_margin": 0.05,       # Distance gap needed to trust a prototype match
+    "motion_gate": True,            # Skip inference while the scene is static
+    "motion_pixel_delta": 15,       # Per-pixel change (0-255) that counts as motion
+    "motion_on_fraction": 0.02,     # Fraction of changed pixels that wakes inference up
+    "motion_off_fraction": 0.005,   # Fraction below which the scene counts as quiet
+    "motion_hold_frames": 30,       # Quiet frames before inference is gated off again
+    "motion_heartbeat": 5.0,        # Seconds between inference frames while gated
+    "motion_background_time": 2.0,  # Seconds for the motion background to absorb a change
+    "governor": True,               # Adapt FPS, detection interval and resolution to load/temperature
+    "governor_min_fps": 5.0,        # Floor for the target frame rate
+    "governor_max_fps": 30.0,       # Ceiling for the target frame rate
+    "governor_levels": 4,           # Steps between the ceiling and the floor
+    "governor_resolutions": (320, 256),  # Detection resolutions used as the governor backs off
+    "governor_target_temp": 70.0,   # Start backing off above this SoC temperature (C)
+    "governor_max_temp": 80.0,      # Back off fully at this temperature (firmware throttles at 80-85C)
+    "governor_max_load": 0.85,      # CPU utilisation that counts as overloaded
+    "governor_period": 2.0,         # Seconds between governor decisions
+    "detection_tiers": False,       # Haar cascade proposes faces, YOLO only confirms its candidates
+    "haar_cascade_file": "haarcascade_frontalface_default.xml",
+    "haar_scale_factor": 1.1,       # Cascade pyramid step (larger is faster, misses more)
+    "haar_min_neighbors": 5,        # Overlapping hits needed for a cascade candidate
+    "haar_min_size": 40,            # Smallest face (pixels) the cascade proposes
+    "haar_downscale": 0.5,          # Cascade runs on the frame scaled by this factor
+    "tier_roi_padding": 0.5,        # Context (x face size) around each candidate given to YOLO
+    "tier_confirm_size": 160,       # YOLO input size for candidate crops
+    "tier_max_fast_misses": 10,     # Cascade misses in a row before YOLO scans the whole frame
+    "detection_resolution": None,   # e.g. 320 or 256 to detect on a letterboxed square, None for full frame
+    "encoding_crop_padding": 0.25,  # Margin (x face size) kept around each face crop sent to the encoder
+    "detection_interval": 5,        # Run YOLO every N frames, track faces in between
+    "scene_change_threshold": 12.0, # Mean pixel change (0-255) that forces an early detection
+    "track_iou_threshold": 0.3,     # Overlap needed to keep a detection on an existing track
+    "track_max_misses": 3,          # Detections a track may go unseen before it is dropped
+    "track_min_quality": 0.5,       # Re-recognise a track when tracking confidence drops below this
+    "recognition_interval": 30,     # Re-verify a tracked identity every N frames
+    "recognition_cache": True,      # Reuse recent matches and vote identities over recent frames
+    "cache_ttl": 10.0,              # Seconds a cached match or track history stays valid
+    "cache_capacity": 128,          # Entries kept before the least recently used is evicted
+    "cache_votes": 5,               # Recognitions per track the identity vote is taken over
+    "cache_quantization": 0.004,    # int8 step for cached embeddings
+    "cache_verify_distance": 0.2,   # Max distance from a cached embedding for a cache hit
     "camera_resolution": (640, 480),
+    "frame_source": "picamera",     # picamera, dir:<path>, video:<path> or synthetic[:<n>]
+    "realtime": True,               # Pace recorded/synthetic frames at their frame rate
     "display_confidence": True,     # Show confidence scores on screen
     "enable_logging": True,         # Log recognitions to file
     "log_file": "face_recognition_log.txt",
-    "fps_update_interval": 10       # Update FPS counter every N frames
+    "launch_dashboard": True,       # Start display_info.py when someone is recognised
+    "show_preview": True,           # Show the camera preview window
+    "fps_update_interval": 10,      # Update FPS counter every N frames
+    "pipeline_queue_size": 1,       # Frames buffered between stages (oldest dropped when full)
+    "pipeline_report_interval": 30  # Log per-stage latency every N seconds
 }
 
 class FaceRecognitionSystem:
-    def __init__(self, config):
+    def __init__(self, config, on_user_change=None):
         self.config = config
+        self.on_user_change = on_user_change  # Called with (name, confidence) instead of launching the dashboard
+        self.stop_event = threading.Event()
         self.currentname = "unknown"
         self.frame_count = 0
         self.start_time = time.time()
+        self.fps = None
+        self.timer = StageTimer()  # Per-step latency inside process_frame
+        
+        # Detect-once, track-in-between state
+        self.tracker = FaceTracker(self.config["track_iou_threshold"], self.config["track_max_misses"])
+        self.frames_since_detection = 0
+        self.detection_thumbnail = None
+        self.previous_gray = None
+        self.detection_tier = None  # Which detector tier produced the current tracks
+        self.tiered = None          # Haar tier in front of YOLO, set up by load_model
+        
+        # Runtime detection settings, adjusted by the governor
+        self.detection_interval = self.config["detection_interval"]
+        self.detection_resolution = self.config["detection_resolution"]
+        self.governor = FrameRateGovernor(
+            min_fps=self.config["governor_min_fps"],
+            max_fps=self.config["governor_max_fps"],
+            base_detection_interval=self.config["detection_interval"],
+            resolutions=[self.config["detection_resolution"]] + list(self.config["governor_resolutions"]),
+            levels=self.config["governor_levels"],
+            target_temp=self.config["governor_target_temp"],
+            max_temp=self.config["governor_max_temp"],
+            max_load=self.config["governor_max_load"],
+            period=self.config["governor_period"],
+        ) if self.config["governor"] else None
+        
+        # Recent matches per embedding and identity votes per track
+        self.cache = RecognitionCache(self.config["cache_ttl"], self.config["cache_capacity"],
+                                      self.config["cache_votes"], self.config["cache_quantization"],
+                                      self.config["cache_verify_distance"], self.config["recognition_threshold"]) \
+            if self.config["recognition_cache"] else None
+        
+        # Unconfirmed identities already announced, name -> time
+        self.candidate_times = {}
+        
+        # Motion gate in front of detection
+        self.gate = MotionGate(self.config["motion_pixel_delta"], self.config["motion_on_fraction"],
+                               self.config["motion_off_fraction"], self.config["motion_hold_frames"],
+                               self.config["motion_heartbeat"], self.config["motion_background_time"]) \
+            if self.config["motion_gate"] else None
         
         # Initialize logging
         if self.config["enable_logging"]:
@@ -53,161 +159,358 @@ class FaceRecognitionSystem:
                 f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {message}\n")
     
     def load_encodings(self):
-        """Load known face encodings from pickle file"""
+        """Load known face encodings from the memory-mapped gallery"""
         self.log("[INFO] Loading encodings...")
         
         try:
-            with open(self.config["encodings_file"], "rb") as f:
-                self.data = pickle.load(f)
+            # One-shot migration from the old pickle format
+            if not gallery_exists(self.config["gallery_file"]) and os.path.exists(self.config["encodings_file"]):
+                self.log(f"[INFO] Migrating {self.config['encodings_file']} to gallery format...")
+                migrate_pickle(self.config["encodings_file"], self.config["gallery_file"])
+            
+            self.gallery = Gallery.load(self.config["gallery_file"])
+            
+            # Pack the gallery once so each frame is matched with one matrix operation
+            # (the memmapped float32 matrix is used as-is, without a copy)
+            self.matcher = FaceMatcher(self.gallery.matrix, self.gallery.row_names)
+            
+            # Match against per-person prototypes first, full gallery only when ambiguous
+            self.load_prototypes()
             
             # Verify encodings data
-            unique_names = set(self.data["names"])
-            self.log(f"[INFO] Loaded {len(self.data['encodings'])} encodings for {len(unique_names)} unique persons")
+            unique_names = set(self.gallery.names)
+            self.log(f"[INFO] Loaded {len(self.gallery)} encodings for {len(unique_names)} unique persons")
             self.log(f"[INFO] People in dataset: {', '.join(unique_names)}")
         except Exception as e:
             self.log(f"[ERROR] Failed to load encodings: {e}")
             exit(1)
     
+    def load_prototypes(self):
+        """Load the prototype index, rebuilding it if it is missing or older than the encodings"""
+        prototypes_file = self.config["prototypes_file"]
+        index = None
+        
+        if os.path.exists(prototypes_file) and \
+                os.path.getmtime(prototypes_file) >= os.path.getmtime(gallery_paths(self.config["gallery_file"])[1]):
+            index = load_prototypes(prototypes_file)
+            if index is not None and index["gallery_size"] != len(self.matcher):
+                index = None
+        
+        if index is None:
+            self.log("[INFO] Building prototype index...")
+            index = build_prototypes(self.gallery.matrix, self.matcher.names,
+                                     per_person=self.config["prototypes_per_person"])
+            try:
+                save_prototypes(index, prototypes_file)
+            except Exception as e:
+                self.log(f"[WARNING] Could not save prototype index: {e}")
+        
+        self.matcher = PrototypeIndex(index, self.matcher,
+                                      threshold=self.config["recognition_threshold"],
+                                      margin=self.config["prototype_margin"])
+        self.log(f"[INFO] Prototype index: {len(index['names'])} prototypes for {len(index['spread'])} persons")
+    
     def load_model(self):
-        """Load YOLO model for face detection"""
-        try:
-            self.log("[INFO] Loading YOLO face detection model...")
-            self.model = YOLO(self.config["face_model_path"])
-        except Exception as e:
-            self.log(f"[ERROR] Failed to load YOLO model: {e}")
-            exit(1)
+        """Connect to the model server, or load the YOLO model for face detection locally"""
+        self.model_client = None
+        if self.config["model_server"]:
+            self.model_client = ModelClient.connect(self.config["model_server_socket"])
+            if self.model_client is not None:
+                self.log(f"[INFO] Using warm models from {self.model_client.socket_path}")
+            else:
+                self.log("[INFO] Model server not running, loading models locally")
+        
+        if self.model_client is None:
+            try:
+                self.log(f"[INFO] Loading YOLO face detection model ({self.config['detector_backend']} backend)...")
+                self.detector = create_detector(self.config["detector_backend"], self.config["face_model_path"])
+            except Exception as e:
+                self.log(f"[ERROR] Failed to load YOLO model: {e}")
+                exit(1)
+        
+        # Optional cheap first tier in front of YOLO (served or local, it only needs detect_full)
+        self.tiered = None
+        if self.config["detection_tiers"]:
+            try:
+                haar = HaarDetector(self.config["haar_cascade_file"], self.config["haar_scale_factor"],
+                                    self.config["haar_min_neighbors"], self.config["haar_min_size"],
+                                    self.config["haar_downscale"])
+                self.tiered = TieredDetector(haar, self.config["detection_confidence"],
+                                             self.config["tier_roi_padding"], self.config["tier_confirm_size"],
+                                             self.config["tier_max_fast_misses"])
+            except Exception as e:
+                self.log(f"[WARNING] Haar tier disabled: {e}")
     
     def setup_camera(self):
-        """Initialize and configure the Raspberry Pi camera"""
+        """Initialize the configured frame source (the Raspberry Pi camera by default)"""
         try:
-            self.log("[INFO] Initializing camera...")
-            self.picam2 = Picamera2()
-            self.picam2.configure(self.picam2.create_preview_configuration(
-                main={"format": 'XRGB8888', "size": self.config["camera_resolution"]}
-            ))
-            self.picam2.start()
-            self.log("[INFO] Warming up camera...")
-            time.sleep(2.0)
+            self.log(f"[INFO] Initializing frame source: {self.config['frame_source']}...")
+            self.source = create_frame_source(self.config["frame_source"],
+                                              self.config["camera_resolution"],
+                                              self.config["realtime"])
+            self.source.start()
         except Exception as e:
             self.log(f"[ERROR] Camera initialization failed: {e}")
             exit(1)
     
-    def process_frame(self, frame):
-        """Process a single frame for face detection and recognition"""
-        # Convert frame to RGB for processing
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_RGBA2RGB)
-        display_frame = frame_rgb.copy()
-        
-        # Detect faces using YOLO
-        results = self.model(frame_rgb)
-        boxes = results[0].boxes
-        
-        recognized_faces = []
-        
-        # Process each detected face
-        for box in boxes:
-            # Extract coordinates
-            x1, y1, x2, y2 = box.xyxy[0].tolist()
-            conf = box.conf[0].item()
+    def launch_display_info(self):
+        """Start display_info.py unless it is already running, then exit"""
+        try:
+            import subprocess
+            import sys
+            import os
+
+            # Check if display_info.py is already running
+            display_info_running = False
+            if os.name == 'posix':  # Linux/Raspberry Pi OS
+                try:
+                    check_process = subprocess.run(
+                        ["pgrep", "-f", "python.*display_info.py"], 
+                        capture_output=True, 
+                        text=True,
+                        shell=True  # Use shell on Raspberry Pi for better pattern matching
+                    )
+                    display_info_running = check_process.returncode == 0
+                except Exception as e:
+                    self.log(f"[WARNING] Process check error: {e}")
+            else:  # Windows
+                try:
+                    check_process = subprocess.run(
+                        ["tasklist", "/FI", "IMAGENAME eq python.exe", "/FO", "CSV"], 
+                        capture_output=True, 
+                        text=True
+                    )
+                    display_info_running = "display_info.py" in check_process.stdout
+                except:
+                    pass
             
+            # Only launch if not already running
+            if not display_info_running:
+                # Get absolute path to script directory
+                script_dir = os.path.dirname(os.path.abspath(__file__))
+                script_path = os.path.join(script_dir, "display_info.py")
+                
+                # On Raspberry Pi, use python3 explicitly
+                if os.name == 'posix':
+                    self.log("[INFO] Starting display_info.py with python3...")
+                    subprocess.Popen(["python3", script_path])
+                else:
+                    # On Windows, use sys.executable
+                    self.log("[INFO] Starting display_info.py...")
+                    subprocess.Popen([sys.executable, script_path])
+                
+                # Stop running this script after launching display_info.py
+                self.log("[INFO] Exiting smoothrecog.py after launching display_info.py")
+                exit()
+        except Exception as e:
+            self.log(f"[ERROR] Failed to launch display_info.py: {e}")
+    
+    def detect_faces(self, frame_rgb):
+        """Run the detector tiers and return (left, top, right, bottom, conf) for confident detections"""
+        with self.timer.measure("detection"):
+            if self.tiered is not None:
+                boxes, self.detection_tier = self.tiered.detect(frame_rgb, self.detect_full,
+                                                                expected=len(self.tracker.tracks))
+            else:
+                boxes, self.detection_tier = self.detect_full(frame_rgb), "yolo"
+        detections = []
+        for x1, y1, x2, y2, conf in boxes:
             if conf > self.config["detection_confidence"]:
                 # Convert to integers for drawing
-                left, top, right, bottom = int(x1), int(y1), int(x2), int(y2)
+                detections.append((int(x1), int(y1), int(x2), int(y2), conf))
+        return detections
+    
+    def detect_full(self, image, imgsz=None):
+        """YOLO boxes in image coordinates; whole frames use the current detection resolution"""
+        if imgsz is not None:
+            return self.run_detector(image, imgsz)
+        detection_size = self.detection_resolution
+        if not detection_size:
+            return self.run_detector(image)
+        
+        # Detect on a small letterboxed copy; YOLO then works on far fewer pixels
+        small, transform = letterbox(image, detection_size)
+        # Scale the boxes back up to full resolution
+        return [unletterbox_box((x1, y1, x2, y2), transform, image.shape) + (conf,)
+                for x1, y1, x2, y2, conf in self.run_detector(small, detection_size)]
+    
+    def run_detector(self, image, imgsz=None):
+        """Raw (x1, y1, x2, y2, conf) boxes from the model server or the local detector backend"""
+        if self.model_client is not None:
+            return self.model_client.detect(image, imgsz)
+        return self.detector.detect(image, imgsz)
+    
+    def recognize_faces(self, frame_rgb, boxes):
+        """Encode the given (left, top, right, bottom) boxes and return (name, confidence) for each"""
+        face_encodings = [None] * len(boxes)
+        
+        # Encode all faces in one pass, from a single full-resolution crop around them
+        with self.timer.measure("encoding"):
+            if boxes:
+                crop, (x0, y0) = padded_crop(frame_rgb, boxes, self.config["encoding_crop_padding"])
                 
-                # Format for face_recognition
-                face_locations = [(top, right, bottom, left)]
+                # Format for face_recognition, relative to the crop
+                face_locations = [(top - y0, right - x0, bottom - y0, left - x0)
+                                  for left, top, right, bottom in boxes]
                 
                 try:
                     # Get face encodings
-                    encodings = face_recognition.face_encodings(frame_rgb, face_locations)
-                    
-                    name = "Unknown"
-                    confidence = 0.0
-                    
-                    if len(encodings) > 0:
-                        encoding = encodings[0]
-                        
-                        # Calculate face distances and find matches
-                        face_distances = face_recognition.face_distance(self.data["encodings"], encoding)
-                        
-                        if len(face_distances) > 0:
-                            # Find best match
-                            best_match_index = np.argmin(face_distances)
-                            best_match_distance = face_distances[best_match_index]
-                            matches = face_recognition.compare_faces(self.data["encodings"], encoding)
-                            
-                            # Check if match is good enough
-                            if matches[best_match_index] and best_match_distance < self.config["recognition_threshold"]:
-                                name = self.data["names"][best_match_index]
-                                confidence = 1 - best_match_distance
-                                
-                                # Log new person detections
-                                if self.currentname != name:
-                                    self.currentname = name
-                                    self.log(f"[DETECTED] {name} with confidence: {confidence:.2f}")
-                                    current_user.update_user(name)
-                                    
-                                    # Launch display_info.py when a face is recognized
-                                    try:
-                                        import subprocess
-                                        import sys
-                                        import os
-
-                                        # Check if display_info.py is already running
-                                        display_info_running = False
-                                        if os.name == 'posix':  # Linux/Raspberry Pi OS
-                                            try:
-                                                check_process = subprocess.run(
-                                                    ["pgrep", "-f", "python.*display_info.py"], 
-                                                    capture_output=True, 
-                                                    text=True,
-                                                    shell=True  # Use shell on Raspberry Pi for better pattern matching
-                                                )
-                                                display_info_running = check_process.returncode == 0
-                                            except Exception as e:
-                                                self.log(f"[WARNING] Process check error: {e}")
-                                        else:  # Windows
-                                            try:
-                                                check_process = subprocess.run(
-                                                    ["tasklist", "/FI", "IMAGENAME eq python.exe", "/FO", "CSV"], 
-                                                    capture_output=True, 
-                                                    text=True
-                                                )
-                                                display_info_running = "display_info.py" in check_process.stdout
-                                            except:
-                                                pass
-                                        
-                                        # Only launch if not already running
-                                        if not display_info_running:
-                                            # Get absolute path to script directory
-                                            script_dir = os.path.dirname(os.path.abspath(__file__))
-                                            script_path = os.path.join(script_dir, "display_info.py")
-                                            
-                                            # On Raspberry Pi, use python3 explicitly
-                                            if os.name == 'posix':
-                                                self.log("[INFO] Starting display_info.py with python3...")
-                                                subprocess.Popen(["python3", script_path])
-                                            else:
-                                                # On Windows, use sys.executable
-                                                self.log("[INFO] Starting display_info.py...")
-                                                subprocess.Popen([sys.executable, script_path])
-                                            
-                                            # Stop running this script after launching display_info.py
-                                            self.log("[INFO] Exiting smoothrecog.py after launching display_info.py")
-                                            exit()
-                                    except Exception as e:
-                                        self.log(f"[ERROR] Failed to launch display_info.py: {e}")
-                    
-                    # Store recognition results for display
-                    recognized_faces.append({
-                        "name": name,
-                        "confidence": confidence,
-                        "box": (left, top, right, bottom)
-                    })
-                    
+                    if self.model_client is not None:
+                        face_encodings = self.model_client.encode(crop, face_locations)
+                    else:
+                        face_encodings = encode_faces(crop, face_locations)
                 except Exception as e:
                     self.log(f"[ERROR] Face recognition error: {e}")
         
+        # Match every encoded face in the frame against the gallery in one batch,
+        # except faces whose match is still in the cache
+        encoded = [encoding for encoding in face_encodings if encoding is not None]
+        with self.timer.measure("matching"):
+            cached = [self.cache.lookup(encoding) if self.cache is not None else None for encoding in encoded]
+            misses = [encoding for encoding, hit in zip(encoded, cached) if hit is None]
+            searched = iter(self.matcher.match(misses) if misses else [])
+            results = []
+            for encoding, hit in zip(encoded, cached):
+                if hit is None:
+                    hit = next(searched)
+                    if self.cache is not None:
+                        self.cache.store(encoding, *hit)
+                results.append(hit)
+            matches = iter(results)
+        
+        identities = []
+        for encoding in face_encodings:
+            name = "Unknown"
+            confidence = 0.0
+            
+            if encoding is not None:
+                best_name, best_match_distance = next(matches)
+                
+                # Check if match is good enough
+                if best_match_distance < self.config["recognition_threshold"]:
+                    name = best_name
+                    confidence = 1 - best_match_distance
+                # Not good enough yet, but likely: let the dashboard prefetch their data
+                elif best_match_distance < self.config["candidate_threshold"]:
+                    self.report_candidate(best_name, 1 - best_match_distance)
+            
+            identities.append((name, confidence))
+        return identities
+    
+    def report_identity(self, name, confidence):
+        """Log and publish a newly recognised person"""
+        if name == "Unknown" or self.currentname == name:
+            return
+        
+        # Log new person detections
+        self.currentname = name
+        self.log(f"[DETECTED] {name} with confidence: {confidence:.2f}")
+        current_user.update_user(name, float(confidence))
+        
+        # Hand over to the supervisor if there is one, otherwise launch display_info.py
+        if self.on_user_change is not None:
+            self.on_user_change(name, float(confidence))
+        elif self.config["launch_dashboard"]:
+            self.launch_display_info()
+    
+    def report_candidate(self, name, confidence):
+        """Publish a likely but unconfirmed person so their dashboard data can be prefetched"""
+        now = time.time()
+        if name == self.currentname or now - self.candidate_times.get(name, 0) < self.config["candidate_interval"]:
+            return
+        
+        self.candidate_times[name] = now
+        self.log(f"[CANDIDATE] {name} with confidence: {confidence:.2f}")
+        try:
+            user_events.publish(user_events.make_event("candidate", name=name, confidence=float(confidence)))
+        except Exception as e:
+            # Prefetching is only a nicety; it must never stop recognition
+            self.log(f"[WARNING] Could not publish candidate: {e}")
+    
+    def process_frame(self, frame):
+        """Process a single frame for face detection and recognition"""
+        frame_rgb, recognized_faces = self.analyze_frame(frame)
+        return self.draw_results(frame_rgb, recognized_faces), recognized_faces
+    
+    def describe_tracks(self, tracks):
+        """Recognition results for display, one dict per tracked face"""
+        return [{
+            "name": track.name,
+            "confidence": track.confidence,
+            "box": track.box,
+            "track_id": track.id
+        } for track in tracks]
+    
+    def analyze_frame(self, frame):
+        """Detect, track and recognise faces in a frame without drawing anything"""
+        # Convert frame to RGB for processing
+        with self.timer.measure("color_conversion"):
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_RGBA2RGB)
+            gray = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2GRAY)
+            thumbnail = scene_thumbnail(gray)
+        
+        # Static scene: keep the last results and skip detection, tracking and recognition
+        if self.gate is not None and not self.gate.update(thumbnail):
+            self.previous_gray = gray
+            self.update_fps()
+            return frame_rgb, self.describe_tracks(self.tracker.tracks)
+        
+        # Run the detector every N frames, or straight away if the scene changed.
+        # A heartbeat through a closed gate is the only look in seconds, so it always detects
+        self.frames_since_detection += 1
+        scene_changed = self.detection_thumbnail is None or \
+            scene_difference(thumbnail, self.detection_thumbnail) > self.config["scene_change_threshold"]
+        heartbeat = self.gate is not None and self.gate.heartbeat_pass
+        
+        if scene_changed or heartbeat or self.frames_since_detection >= self.detection_interval:
+            # Detect faces using YOLO and hand them to the tracker
+            tracks = self.tracker.update(self.detect_faces(frame_rgb))
+            self.frames_since_detection = 0
+            self.detection_thumbnail = thumbnail
+        else:
+            # Carry the existing boxes forward with optical flow
+            with self.timer.measure("tracking"):
+                tracks = self.tracker.predict(self.previous_gray, gray)
+        self.previous_gray = gray
+        
+        # Only new or uncertain tracks go through encoding and matching
+        pending = [track for track in tracks
+                   if track.needs_recognition(self.config["track_min_quality"],
+                                              self.config["recognition_interval"])]
+        if pending:
+            identities = self.recognize_faces(frame_rgb, [track.box for track in pending])
+            for track, (name, confidence) in zip(pending, identities):
+                if self.cache is not None:
+                    # Majority vote over the track's recent recognitions stops names flickering
+                    observed, observed_confidence = name, confidence
+                    name, confidence = self.cache.vote(track.id, name, confidence)
+                    # Outvoted for now, but may win the next votes
+                    if observed not in ("Unknown", name):
+                        self.report_candidate(observed, observed_confidence)
+                track.set_identity(name, confidence)
+                self.report_identity(name, confidence)
+        
+        # Store recognition results for display
+        recognized_faces = self.describe_tracks(tracks)
+        
+        self.update_fps()
+        return frame_rgb, recognized_faces
+    
+    def update_fps(self):
+        """Calculate FPS over every analysed frame"""
+        self.frame_count += 1
+        if self.frame_count % self.config["fps_update_interval"] == 0:
+            elapsed_time = time.time() - self.start_time
+            self.fps = self.frame_count / elapsed_time
+    
+    def draw_results(self, frame_rgb, recognized_faces):
+        """Draw face boxes, names and the FPS counter on a copy of the frame"""
+        with self.timer.measure("drawing"):
+            return self._draw_results(frame_rgb, recognized_faces)
+    
+    def _draw_results(self, frame_rgb, recognized_faces):
+        display_frame = frame_rgb.copy()
+        
         # Draw results on frame
         for face in recognized_faces:
             left, top, right, bottom = face["box"]
@@ -226,62 +529,160 @@ class FaceRecognitionSystem:
             cv2.putText(display_frame, display_text, (left, y), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
         
-        # Calculate and display FPS
-        self.frame_count += 1
-        if self.frame_count % self.config["fps_update_interval"] == 0:
-            elapsed_time = time.time() - self.start_time
-            fps = self.frame_count / elapsed_time
-            fps_text = f"FPS: {fps:.2f}"
+        # Display FPS
+        if self.fps is not None:
+            fps_text = f"FPS: {self.fps:.2f}"
             cv2.putText(display_frame, fps_text, (10, 30), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
         
-        return display_frame, recognized_faces
+        return display_frame
+    
+    def capture_stage(self):
+        """Pipeline stage: grab the next frame with its capture time"""
+        if self.governor is not None:
+            self.governor.pace()
+        frame = self.source.read()
+        if frame is None:
+            raise EndOfStream()
+        return time.perf_counter(), frame
+    
+    def inference_stage(self, item):
+        """Pipeline stage: detect, track and recognise faces in the freshest frame"""
+        captured_at, frame = item
+        start = time.perf_counter()
+        frame_rgb, faces = self.analyze_frame(frame)
+        self.result_latency.record(time.perf_counter() - captured_at)
+        
+        if self.governor is not None:
+            self.governor.observe(time.perf_counter() - start)
+            if self.governor.update():
+                self.apply_governor()
+        return captured_at, frame_rgb, faces
+    
+    def apply_governor(self):
+        """Adopt the governor's detection settings and log why they changed"""
+        self.detection_interval = self.governor.detection_interval
+        self.detection_resolution = self.governor.detection_resolution
+        self.log(f"[GOVERNOR] {self.governor}")
+    
+    def log_pipeline_stats(self):
+        """Log per-stage latency and how many stale frames were dropped"""
+        for stats in self.pipeline_stats:
+            self.log(f"[PIPELINE] {stats}")
+        self.log(f"[PIPELINE] dropped frames: capture->inference {self.capture_queue.dropped}, "
+                 f"inference->render {self.render_queue.dropped}")
+        if self.gate is not None:
+            self.log(f"[PIPELINE] motion gate: {self.gate}")
+        if self.governor is not None:
+            self.log(f"[PIPELINE] governor: {self.governor}")
+        if self.tiered is not None:
+            self.log(f"[PIPELINE] detector tiers: {self.tiered}")
+        if self.cache is not None:
+            self.log(f"[PIPELINE] recognition cache: {self.cache}")
     
     def run(self):
         """Run the face recognition loop"""
         self.log("[INFO] Starting face recognition...")
+        preview = self.config["show_preview"]
         
-        # Create window with normal flags for resizing
-        cv2.namedWindow("Face Recognition", cv2.WINDOW_NORMAL)
-        
-        # Set window properties to make it minimized/smaller
-        cv2.resizeWindow("Face Recognition", 320, 240)  # Small window size
+        if preview:
+            # Create window with normal flags for resizing
+            cv2.namedWindow("Face Recognition", cv2.WINDOW_NORMAL)
+            
+            # Set window properties to make it minimized/smaller
+            cv2.resizeWindow("Face Recognition", 320, 240)  # Small window size
+            
+            # Move window to the corner (this positioning varies by OS)
+            cv2.moveWindow("Face Recognition", 50, 50)
         
-        # Move window to the corner (this positioning varies by OS)
-        cv2.moveWindow("Face Recognition", 50, 50)
+        # Capture and inference run on their own threads; rendering stays on the
+        # main thread because OpenCV windows must be driven from there
+        stop_event = self.stop_event
+        stop_event.clear()
+        self.capture_queue = LatestQueue(self.config["pipeline_queue_size"])
+        self.render_queue = LatestQueue(self.config["pipeline_queue_size"])
+        stages = [
+            PipelineStage("capture", self.capture_stage, stop_event, output_queue=self.capture_queue),
+            PipelineStage("inference", self.inference_stage, stop_event,
+                          input_queue=self.capture_queue, output_queue=self.render_queue),
+        ]
+        render_stats = StageStats("render")
+        self.result_latency = StageStats("capture-to-result")
+        self.pipeline_stats = [stage.stats for stage in stages] + [render_stats, self.result_latency]
+        last_report = time.time()
         
         try:
-            while True:
-                # Capture frame
-                frame = self.picam2.capture_array()
-                
-                # Process the frame
-                display_frame, faces = self.process_frame(frame)
-                
-                # Display the frame
-                cv2.imshow("Face Recognition", display_frame)
+            for stage in stages:
+                stage.start()
+            
+            while not stop_event.is_set():
+                item = self.render_queue.get(timeout=0.05)
+                if item is not None and preview:
+                    start = time.perf_counter()
+                    captured_at, frame_rgb, faces = item
+                    
+                    # Display the frame
+                    cv2.imshow("Face Recognition", self.draw_results(frame_rgb, faces))
+                    render_stats.record(time.perf_counter() - start)
                 
                 # Check for exit key
-                key = cv2.waitKey(1) & 0xFF
-                if key == ord("q"):
+                if preview and cv2.waitKey(1) & 0xFF == ord("q"):
                     break
                 
+                if time.time() - last_report >= self.config["pipeline_report_interval"]:
+                    self.log_pipeline_stats()
+                    last_report = time.time()
+            
+            stop_event.set()
+            for stage in stages:
+                stage.join(timeout=2.0)
+            
+            # Surface failures (and exit() calls) from the worker stages on the main thread
+            for stage in stages:
+                if isinstance(stage.error, (SystemExit, KeyboardInterrupt)):
+                    raise stage.error
+                if isinstance(stage.error, EndOfStream):
+                    self.log("[INFO] Frame source finished")
+                elif stage.error is not None:
+                    self.log(f"[ERROR] {stage.name} stage failed: {stage.error}")
+                
         except KeyboardInterrupt:
             self.log("[INFO] Interrupted by user")
         except Exception as e:
             self.log(f"[ERROR] Runtime error: {e}")
         finally:
+            # Stop the worker stages before the camera is released under them
+            stop_event.set()
+            for stage in stages:
+                if stage.is_alive():
+                    stage.join(timeout=2.0)
+            self.log_pipeline_stats()
             self.cleanup()
     
+    def stop(self):
+        """Ask a running recognition loop (e.g. on a supervisor thread) to finish"""
+        self.stop_event.set()
+    
     def cleanup(self):
         """Clean up resources"""
-        cv2.destroyAllWindows()
-        self.picam2.stop()
+        if self.config["show_preview"]:
+            cv2.destroyAllWindows()
+        self.source.stop()
         self.log("[INFO] Face recognition system stopped")
         if self.config["enable_logging"]:
             self.log(f"===== Session Ended at {time.strftime('%Y-%m-%d %H:%M:%S')} =====\n")
 
 # Run the application
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Smart mirror face recognition")
+    parser.add_argument("--source", default=CONFIG["frame_source"],
+                        help="picamera, dir:<path>, video:<path> or synthetic[:<n>]")
+    parser.add_argument("--fast", action="store_true",
+                        help="feed recorded frames as fast as possible instead of in real time")
+    args = parser.parse_args()
+    CONFIG["frame_source"] = args.source
+    CONFIG["realtime"] = not args.fast
+    
     system = FaceRecognitionSystem(CONFIG)
     system.run()
@@ -0,0 +1,282 @@
+"""
+Headless end-to-end benchmark for the face recognition pipeline.
+
+    python benchmark.py run fixtures/alice fixtures/family --output bench.json
+    python benchmark.py sweep --output sweep.json
+    python benchmark.py record fixtures/alice --identity alice --frames 300
+    python benchmark.py compare old.json new.json
+
+A fixture is a directory of frames (JPEG/PNG, played in file name order) plus
+a labels.json describing who is visible:
+    {"identity": "alice"}                          same people in every frame
+    {"frames": {"frame_0001.jpg": ["alice"], ...}} per-frame identities
+Results are written as sorted, indented JSON so two runs can be diffed.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import time
+import numpy as np
+
+from frame_pipeline import StageStats, StageTimer
+
+# Gallery sizes used by the matching sweep
+SWEEP_SIZES = [100, 1000, 5000, 10000, 50000]
+ENCODINGS_PER_PERSON = 250
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_labels(fixture_dir):
+    """Return a function mapping a frame file name to the set of expected identities"""
+    try:
+        with open(os.path.join(fixture_dir, "labels.json"), "r") as f:
+            labels = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    per_frame = labels.get("frames", {})
+    default = labels.get("identity")
+    default = set([default] if isinstance(default, str) else default or [])
+    return lambda frame_name: set(per_frame.get(frame_name, default))
+
+
+def accuracy(counts):
+    """Frame accuracy, precision and recall from accumulated counts"""
+    frames, correct, true_positives, false_positives, missed = counts
+    return {
+        "frames": frames,
+        "frame_accuracy": correct / frames if frames else 0.0,
+        "precision": true_positives / (true_positives + false_positives) if true_positives + false_positives else 0.0,
+        "recall": true_positives / (true_positives + missed) if true_positives + missed else 0.0,
+        "true_positives": true_positives,
+        "false_positives": false_positives,
+        "missed": missed,
+    }
+
+
+def benchmark_fixture(config, fixture_dir, draw=True):
+    """Run FaceRecognitionSystem over one fixture and return its metrics"""
+    from Face_recog_Gui import FaceRecognitionSystem
+
+    config = dict(config,
+                  frame_source=f"dir:{fixture_dir}",
+                  realtime=False,
+                  enable_logging=False,
+                  launch_dashboard=False)
+    system = FaceRecognitionSystem(config)
+    system.timer = StageTimer(window=None)  # Keep every sample for percentiles
+    frame_stats = StageStats("frame", window=None)
+    expected_for = load_labels(fixture_dir)
+
+    # [frames, correct frames, true positives, false positives, missed] overall and per detector tier
+    totals = [0] * 5
+    per_tier = {}
+    frames = 0
+    start = time.perf_counter()
+
+    while True:
+        frame = system.source.read()
+        if frame is None:
+            break
+        frame_start = time.perf_counter()
+        frame_rgb, faces = system.analyze_frame(frame)
+        if draw:
+            system.draw_results(frame_rgb, faces)
+        frame_stats.record(time.perf_counter() - frame_start)
+
+        if expected_for is not None:
+            # Labels follow the file the frame came from, so skipped unreadable files can't shift them
+            expected = expected_for(os.path.basename(system.source.current_file))
+            predicted = {face["name"] for face in faces if face["name"] not in (None, "Unknown")}
+            frame_counts = [1, predicted == expected, len(predicted & expected),
+                            len(predicted - expected), len(expected - predicted)]
+            # Credit the frame to the tier whose detection produced the current tracks
+            tier = per_tier.setdefault(system.detection_tier or "none", [0] * 5)
+            for i, count in enumerate(frame_counts):
+                totals[i] += count
+                tier[i] += count
+        frames += 1
+
+    elapsed = time.perf_counter() - start
+    system.source.stop()
+
+    result = {
+        "frames": frames,
+        "seconds": elapsed,
+        "fps": frames / elapsed if elapsed > 0 else 0.0,
+        "frame_latency": frame_stats.summary(),
+        "stages": system.timer.summary(),
+        "peak_rss_mb": peak_rss_mb(),
+        "model_server": system.model_client is not None,
+        "skipped_frames": system.source.skipped,
+    }
+    if system.gate is not None:
+        result["motion_gate"] = system.gate.summary()
+    if system.cache is not None:
+        result["recognition_cache"] = system.cache.summary()
+    if system.tiered is not None:
+        result["detector_tiers"] = system.tiered.summary()
+    if expected_for is not None:
+        result["accuracy"] = accuracy(totals)
+        result["accuracy_by_tier"] = {tier: accuracy(counts) for tier, counts in per_tier.items()}
+    return result
+
+
+def synthetic_gallery(size, seed=0):
+    """Random encodings clustered per person, roughly the scale of dlib embeddings"""
+    rng = np.random.default_rng(seed)
+    people = max(1, size // ENCODINGS_PER_PERSON)
+    centers = rng.normal(0, 0.08, size=(people, 128)).astype(np.float32)
+    labels = np.arange(size) % people
+    encodings = centers[labels] + rng.normal(0, 0.03, size=(size, 128)).astype(np.float32)
+    names = [f"person_{label}" for label in labels]
+    return encodings, names, centers
+
+
+def gallery_sweep(sizes=SWEEP_SIZES, queries=200, faces_per_frame=(1, 4), threshold=0.55):
+    """Time full-gallery and prototype matching as the gallery grows"""
+    from face_matcher import FaceMatcher
+    from face_prototypes import PrototypeIndex, build_prototypes
+
+    rng = np.random.default_rng(1)
+    results = []
+    for size in sizes:
+        encodings, names, centers = synthetic_gallery(size)
+        full = FaceMatcher(encodings, names)
+
+        build_start = time.perf_counter()
+        prototypes = PrototypeIndex(build_prototypes(encodings, names), full, threshold)
+        build_seconds = time.perf_counter() - build_start
+
+        entry = {"gallery_size": size, "prototype_build_seconds": build_seconds, "matching": {}}
+        for batch in faces_per_frame:
+            for label, matcher in (("full", full), ("prototype", prototypes)):
+                stats = StageStats(f"{label}_{batch}", window=None)
+                for _ in range(queries):
+                    picks = rng.integers(len(centers), size=batch)
+                    query = centers[picks] + rng.normal(0, 0.03, size=(batch, 128)).astype(np.float32)
+                    start = time.perf_counter()
+                    matcher.match(query)
+                    stats.record(time.perf_counter() - start)
+                entry["matching"][f"{label}_{batch}_faces"] = stats.summary()
+        entry["prototype_fallback_rate"] = prototypes.fallbacks / max(1, prototypes.lookups)
+        results.append(entry)
+        print(f"[INFO] Gallery {size}: full {entry['matching']['full_1_faces']['p50_ms']:.3f} ms, "
+              f"prototype {entry['matching']['prototype_1_faces']['p50_ms']:.3f} ms per face (p50)")
+    return results
+
+
+def record_fixture(output_dir, identity, frames, source_spec="picamera", interval=0.1):
+    """Record frames from a source into a fixture directory with a labels.json"""
+    import cv2
+    from frame_source import create_frame_source
+
+    os.makedirs(output_dir, exist_ok=True)
+    with create_frame_source(source_spec) as source:
+        for i in range(frames):
+            frame = source.read()
+            if frame is None:
+                break
+            # Store the frame the way the camera delivered it (first three channels)
+            cv2.imwrite(os.path.join(output_dir, f"frame_{i:05d}.jpg"), frame[:, :, :3])
+            time.sleep(interval)
+
+    with open(os.path.join(output_dir, "labels.json"), "w") as f:
+        json.dump({"identity": identity.split(",") if identity else []}, f, indent=4)
+    print(f"[INFO] Recorded {frames} frames to {output_dir}")
+
+
+def compare(old_path, new_path):
+    """Print the change in the headline numbers between two result files"""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    for fixture, new_result in new.get("fixtures", {}).items():
+        old_result = old.get("fixtures", {}).get(fixture)
+        if old_result is None:
+            continue
+        print(f"{fixture}: fps {old_result['fps']:.2f} -> {new_result['fps']:.2f}")
+        for stage, stats in new_result["stages"].items():
+            old_stats = old_result["stages"].get(stage, {})
+            if "p50_ms" in stats and "p50_ms" in old_stats:
+                print(f"  {stage}: p50 {old_stats['p50_ms']:.2f} -> {stats['p50_ms']:.2f} ms, "
+                      f"p95 {old_stats['p95_ms']:.2f} -> {stats['p95_ms']:.2f} ms")
+        if "accuracy" in new_result and "accuracy" in old_result:
+            print(f"  frame accuracy {old_result['accuracy']['frame_accuracy']:.3f} -> "
+                  f"{new_result['accuracy']['frame_accuracy']:.3f}")
+        for tier, stats in new_result.get("accuracy_by_tier", {}).items():
+            print(f"  {tier} tier: precision {stats['precision']:.3f}, recall {stats['recall']:.3f} "
+                  f"over {stats['frames']} frames")
+
+
+def write_results(results, output):
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"[INFO] Results written to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Face recognition benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="benchmark recorded fixtures")
+    run.add_argument("fixtures", nargs="+")
+    run.add_argument("--output", default="benchmark_results.json")
+    run.add_argument("--no-draw", action="store_true", help="skip drawing results onto frames")
+    run.add_argument("--sweep", action="store_true", help="also run the gallery-size sweep")
+    run.add_argument("--local-models", action="store_true", help="load models in-process even if the model server runs")
+    run.add_argument("--tiers", action="store_true", help="enable the Haar cascade detection tier")
+
+    sweep = commands.add_parser("sweep", help="only run the gallery-size sweep")
+    sweep.add_argument("--output", default="benchmark_sweep.json")
+    sweep.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",")], default=SWEEP_SIZES)
+
+    record = commands.add_parser("record", help="record a fixture from a frame source")
+    record.add_argument("output_dir")
+    record.add_argument("--identity", default="", help="comma-separated names visible in the recording")
+    record.add_argument("--frames", type=int, default=300)
+    record.add_argument("--source", default="picamera")
+
+    diff = commands.add_parser("compare", help="compare two result files")
+    diff.add_argument("old")
+    diff.add_argument("new")
+
+    args = parser.parse_args()
+    results = {
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+    }
+
+    if args.command == "run":
+        from Face_recog_Gui import CONFIG
+        CONFIG["model_server"] = not args.local_models
+        CONFIG["detection_tiers"] = CONFIG["detection_tiers"] or args.tiers
+        results["config"] = {key: value for key, value in CONFIG.items() if not key.endswith("_file")}
+        results["fixtures"] = {}
+        for fixture in args.fixtures:
+            print(f"[INFO] Benchmarking {fixture}...")
+            results["fixtures"][os.path.basename(os.path.normpath(fixture))] = \
+                benchmark_fixture(CONFIG, fixture, draw=not args.no_draw)
+        if args.sweep:
+            results["gallery_sweep"] = gallery_sweep()
+        write_results(results, args.output)
+    elif args.command == "sweep":
+        results["gallery_sweep"] = gallery_sweep(args.sizes)
+        write_results(results, args.output)
+    elif args.command == "record":
+        record_fixture(args.output_dir, args.identity, args.frames, args.source)
+    elif args.command == "compare":
+        compare(args.old, args.new)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,17 @@
 """
 Module for storing the currently recognized user.
 This file serves as a global variable repository that other scripts can import.
+Changes are pushed to subscribers through user_events; current_user.txt is only
+written where no RAM-backed runtime directory exists to hold the last event.
 """
 import os
+import user_events
 
 # Path to the file storing the current user
-USER_FILE = os.path.join(os.path.dirname(os.path.abspath(_file_)), "current_user.txt")
+USER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "current_user.txt")
 '''
 Here, we define a constant USER_FILE that points to the file current_user.txt in the 
-same directory as this script.
+same directory as this script. It is the fallback for systems without a runtime directory.
 '''
 
 # Initialize with default
@@ -16,19 +19,30 @@ if not os.path.exists(USER_FILE):
     with open(USER_FILE, "w") as f:
         f.write("unknown")
 
-def update_user(name):
-    """Update the current user name by writing to a file"""
+def update_user(name, confidence=None):
+    """Publish the current user to every subscriber (file fallback where events aren't available)"""
+    # Store the user before publishing, so subscribers calling get_current_user() see the new one
+    if user_events.runtime_dir() is None:
+        try:
+            with open(USER_FILE, "w") as f:
+                f.write(name)
+        except Exception as e:
+            print(f"Error updating current user: {e}")
+
+    event = user_events.make_event("user", name=name, confidence=confidence)
     try:
-        with open(USER_FILE, "w") as f:
-            f.write(name)
+        user_events.publish(event)
     except Exception as e:
-        print(f"Error updating current user: {e}")
+        print(f"Error publishing current user: {e}")
     
 def get_current_user():
-    """Get the current user name from file"""
+    """Get the current user name from the last event, or from file"""
+    event = user_events.last_event("user")
+    if event is not None:
+        return event["name"]
     try:
         with open(USER_FILE, "r") as f:
             return f.read().strip()
     except Exception as e:
         print(f"Error reading current user: {e}")
-        return "unknown"
\ No newline at end of file
+        return "unknown"
@@ -0,0 +1,448 @@
+"""
+Retained widgets for the dashboard panels (to-do list, stocks, news).
+Each panel builds its widgets once and updates them in place on every refresh:
+labels only get configure() calls for options whose value changed, and rows
+are only created or destroyed when an item appears or disappears. Nothing is
+torn down and rebuilt, so refreshes don't flicker or churn Tk widgets.
+"""
+from datetime import datetime
+import customtkinter as ctk
+
+NOTE_COLOR = "#fff9b1"      # Yellow sticky note color
+STOCK_COLOR = "#e6ffe6"
+HEADLINES_COLOR = "#e1effe"
+
+
+def configure_changed(widget, current, **options):
+    """configure() only the options that differ from `current`, which is updated in place"""
+    changed = {key: value for key, value in options.items() if current.get(key) != value}
+    if changed:
+        widget.configure(**changed)
+        current.update(changed)
+    return bool(changed)
+
+
+def updated_text(fetched, sample_text):
+    """Label for when data was fetched; cached data can be older than the redraw showing it"""
+    if fetched is None:
+        return sample_text
+    return f"Updated at {datetime.fromtimestamp(fetched).strftime('%H:%M:%S')}"
+
+
+class KeyedRows:
+    """Rows keyed by id; a row is created when its key appears and destroyed when it goes"""
+    def __init__(self, parent, row_class):
+        self.parent = parent
+        self.row_class = row_class  # row_class(parent) with update(position, data), place(position), forget(), destroy()
+        self.rows = {}
+        self.order = []
+        self.created = 0
+        self.destroyed = 0
+
+    def sync(self, items):
+        """Show (key, data) items in this order, reusing the rows of keys already shown"""
+        items = list(dict(items).items())
+        keys = [key for key, _ in items]
+        for key in self.order:
+            if key not in keys:
+                self.rows.pop(key).destroy()
+                self.destroyed += 1
+
+        # New rows can simply be placed after the old ones unless an old one changed position
+        # (a removed row shifts the ones after it, and gridded rows are placed by position)
+        kept = [key for key in self.order if key in self.rows]
+        in_order = kept == self.order[:len(kept)] == keys[:len(kept)]
+
+        for position, (key, data) in enumerate(items):
+            row = self.rows.get(key)
+            if row is None:
+                row = self.rows[key] = self.row_class(self.parent)
+                self.created += 1
+                if in_order:
+                    row.place(position)
+            row.update(position, data)
+
+        if not in_order:
+            for key in keys:
+                self.rows[key].forget()
+            for position, key in enumerate(keys):
+                self.rows[key].place(position)
+        self.order = keys
+
+
+class Panel:
+    """A section of the dashboard that can be shown, hidden and switched between states"""
+    def __init__(self, parent, **pack_options):
+        self.frame = ctk.CTkFrame(parent, fg_color="transparent")
+        self.pack_options = pack_options
+        self.visible = False
+        self.states = {}    # state -> [(widget, pack options)] packed in that state
+        self.state = None
+
+    def show(self):
+        if not self.visible:
+            self.frame.pack(**self.pack_options)
+            self.visible = True
+
+    def hide(self):
+        if self.visible:
+            self.frame.pack_forget()
+            self.visible = False
+
+    def set_state(self, state):
+        """Pack the widgets of one state, in order, and unpack all others"""
+        if state == self.state:
+            return
+        for widgets in self.states.values():
+            for widget, _ in widgets:
+                widget.pack_forget()
+        for widget, options in self.states[state]:
+            widget.pack(**options)
+        self.state = state
+
+
+class TodoRow:
+    def __init__(self, parent):
+        self.frame = ctk.CTkFrame(parent, fg_color=NOTE_COLOR)
+        bullet = ctk.CTkLabel(
+            self.frame,
+            text="•",
+            font=ctk.CTkFont(family="Comic Sans MS", size=16),
+            text_color="#333333",
+            fg_color=NOTE_COLOR,
+            width=20
+        )
+        bullet.pack(side="left")
+        self.label = ctk.CTkLabel(
+            self.frame,
+            text="",
+            font=ctk.CTkFont(family="Comic Sans MS", size=16, slant="italic"),
+            text_color="#333333",
+            fg_color=NOTE_COLOR,
+            anchor="w"
+        )
+        self.label.pack(side="left", fill="x", expand=True)
+        self.current = {}
+
+    def update(self, position, item):
+        configure_changed(self.label, self.current, text=f"{item}")
+
+    def place(self, position):
+        self.frame.pack(fill="x", pady=3)
+
+    def forget(self):
+        self.frame.pack_forget()
+
+    def destroy(self):
+        self.frame.destroy()
+
+
+class TodoPanel(Panel):
+    def __init__(self, parent):
+        super().__init__(parent, fill="x")
+        # Title for the sticky note
+        title = ctk.CTkLabel(
+            self.frame,
+            text="My To-Do List",
+            font=ctk.CTkFont(family="Comic Sans MS", size=24, weight="bold"),
+            text_color="#3a7ebf",
+        )
+
+        # Sticky note with the tasks
+        note = ctk.CTkFrame(
+            self.frame,
+            fg_color=NOTE_COLOR,
+            corner_radius=2,
+            border_width=1,
+            border_color="#e0e0e0",  # Light border
+            width=500,  # Fixed width for square shape
+            height=250  # Height
+        )
+        note_padding = ctk.CTkFrame(note, fg_color=NOTE_COLOR)
+        note_padding.pack(fill="both", expand=True, padx=30, pady=20)
+        note_header = ctk.CTkLabel(
+            note_padding,
+            text="Tasks:",
+            font=ctk.CTkFont(family="Comic Sans MS", size=18, weight="bold"),
+            text_color="#333333",
+            fg_color=NOTE_COLOR,
+        )
+        note_header.pack(anchor="w", pady=(0, 5))
+
+        # Add a separator that looks like a pencil line
+        separator = ctk.CTkFrame(note_padding, height=2, fg_color="#cccccc")
+        separator.pack(fill="x", pady=5)
+
+        tasks_scrollable = ctk.CTkScrollableFrame(note_padding, fg_color=NOTE_COLOR, height=150, width=400)
+        tasks_scrollable.pack(fill="both", expand=True)
+        self.tasks = KeyedRows(tasks_scrollable, TodoRow)
+
+        # Empty sticky note when there are no tasks
+        empty_note = ctk.CTkFrame(
+            self.frame,
+            fg_color=NOTE_COLOR,
+            corner_radius=2,
+            width=500,  # Fixed width for square shape
+            height=250   # Height
+        )
+        empty_note.pack_propagate(False)  # Prevent children from changing size
+        empty_message = ctk.CTkLabel(
+            empty_note,
+            text="No tasks yet. Enjoy your free time!",
+            font=ctk.CTkFont(family="Comic Sans MS", size=18, slant="italic"),
+            text_color="#333333",
+            fg_color=NOTE_COLOR,
+        )
+        empty_message.pack(expand=True)
+
+        title_options = {"anchor": "center", "pady": (0, 20)}
+        self.states = {
+            "tasks": [(title, title_options), (note, {"pady": 20})],
+            "empty": [(title, title_options), (empty_note, {"pady": 20})],
+        }
+
+    def update(self, todo_list):
+        # Tasks are keyed by position, so an edited task only changes its label text
+        self.tasks.sync(enumerate(todo_list))
+        self.set_state("tasks" if todo_list else "empty")
+
+
+class StockRow:
+    def __init__(self, parent):
+        self.labels = [
+            ctk.CTkLabel(parent, text="", font=ctk.CTkFont(size=14, weight="bold"), text_color="#003300"),
+            ctk.CTkLabel(parent, text="", font=ctk.CTkFont(size=14), text_color="#003300"),
+            ctk.CTkLabel(parent, text="", font=ctk.CTkFont(size=14, weight="bold")),
+        ]
+        self.current = [{} for _ in self.labels]
+
+    def update(self, position, data):
+        ticker, quote = data
+        # Alternate row colors
+        row_color = "#d1e8d1" if position % 2 == 0 else STOCK_COLOR
+
+        # Change amount and percentage
+        change = float(quote['change'].replace('+', '').replace('-', ''))
+        is_positive = '-' not in quote['change']
+        change_color = "#007700" if is_positive else "#CC0000"
+        change_prefix = "+" if is_positive else "-"
+        if quote['change'] == "0.00":
+            change_prefix = ""
+            change_color = "#666666"
+
+        symbol, price, change_label = self.labels
+        configure_changed(symbol, self.current[0], text=f"{ticker}\n{quote.get('name', '')}", fg_color=row_color)
+        configure_changed(price, self.current[1], text=f"{quote['price']} {quote.get('currency', 'USD')}",
+                          fg_color=row_color)
+        configure_changed(change_label, self.current[2], text=f"{change_prefix}${change:.2f} ({quote['percent']})",
+                          text_color=change_color, fg_color=row_color)
+
+    def place(self, position):
+        for column, label in enumerate(self.labels):
+            label.grid(row=position, column=column, padx=5, pady=8, sticky="w")
+
+    def forget(self):
+        for label in self.labels:
+            label.grid_forget()
+
+    def destroy(self):
+        for label in self.labels:
+            label.destroy()
+
+
+class StockPanel(Panel):
+    def __init__(self, parent):
+        super().__init__(parent, fill="x")
+        # Stock section header
+        title = ctk.CTkLabel(
+            self.frame,
+            text="Stock Portfolio",
+            font=ctk.CTkFont(size=24, weight="bold"),
+            text_color="#3a7ebf",
+        )
+
+        # Loading indicator for stocks
+        loading_frame = ctk.CTkFrame(self.frame)
+        loading_label = ctk.CTkLabel(
+            loading_frame,
+            text="Loading stock data...",
+            font=ctk.CTkFont(size=14),
+        )
+        loading_label.pack(pady=10)
+
+        # Stock table: header row, one row per ticker, last updated time
+        display = ctk.CTkFrame(self.frame, fg_color=STOCK_COLOR, corner_radius=8)
+        header_frame = ctk.CTkFrame(display, fg_color="#006600")
+        header_frame.pack(fill="x", padx=10, pady=(10, 0))
+        stocks_container = ctk.CTkFrame(display, fg_color=STOCK_COLOR)
+        stocks_container.pack(fill="x", padx=10, pady=10)
+        for frame in (header_frame, stocks_container):
+            frame.grid_columnconfigure(0, weight=2)
+            frame.grid_columnconfigure(1, weight=1)
+            frame.grid_columnconfigure(2, weight=1)
+        for column, text in enumerate(["Symbol", "Price", "Change"]):
+            header = ctk.CTkLabel(
+                header_frame,
+                text=text,
+                font=ctk.CTkFont(size=16, weight="bold"),
+                text_color="white",
+            )
+            header.grid(row=0, column=column, padx=5, pady=5, sticky="w")
+        self.stocks = KeyedRows(stocks_container, StockRow)
+
+        self.updated_label = ctk.CTkLabel(
+            display,
+            text="",
+            font=ctk.CTkFont(size=10, slant="italic"),
+            text_color="gray",
+            fg_color=STOCK_COLOR,
+        )
+        self.updated_label.pack(anchor="e", padx=10, pady=(0, 10))
+
+        title_options = {"anchor": "center", "pady": (40, 20)}
+        self.states = {
+            "loading": [(title, title_options), (loading_frame, {"fill": "x", "pady": 10})],
+            "quotes": [(title, title_options), (display, {"fill": "x", "pady": 10})],
+        }
+
+    def show_loading(self):
+        self.set_state("loading")
+
+    def update(self, tickers, stock_data, fetched=None):
+        """fetched is when the oldest shown quote was fetched (None for sample data)"""
+        quotes = [(ticker, stock_data.get(ticker) or stock_data.get(ticker.upper())) for ticker in tickers]
+        self.stocks.sync((ticker, (ticker, quote)) for ticker, quote in quotes if quote)
+        self.updated_label.configure(text=updated_text(fetched, "Sample quotes"))
+        self.set_state("quotes")
+
+
+class HeadlineRow:
+    def __init__(self, parent):
+        self.frame = ctk.CTkFrame(parent)
+        self.label = ctk.CTkLabel(
+            self.frame,
+            text="",
+            font=ctk.CTkFont(size=14, weight="bold"),
+            text_color="#00366e",
+            anchor="w",
+            justify="left",
+            wraplength=600  # Allow wrapping for long headlines
+        )
+        self.label.pack(anchor="w", pady=5, padx=10, fill="x")
+        self.current_frame = {}
+        self.current_label = {}
+
+    def update(self, position, headline):
+        # Different color backgrounds for alternating headlines
+        bg_color = "#d1e5ff" if position % 2 == 0 else HEADLINES_COLOR
+        configure_changed(self.frame, self.current_frame, fg_color=bg_color)
+        configure_changed(self.label, self.current_label, text=f"{position + 1}. {headline}", fg_color=bg_color)
+
+    def place(self, position):
+        self.frame.pack(fill="x", padx=5, pady=3)
+
+    def forget(self):
+        self.frame.pack_forget()
+
+    def destroy(self):
+        self.frame.destroy()
+
+
+class CategoryBlock:
+    def __init__(self, parent):
+        self.frame = ctk.CTkFrame(parent)
+        self.title = ctk.CTkLabel(
+            self.frame,
+            text="",
+            font=ctk.CTkFont(size=18, weight="bold"),
+            text_color="white",
+            fg_color="#3a7ebf",
+            corner_radius=8,
+        )
+        self.title.pack(fill="x", pady=(0, 10), padx=10)
+
+        # Headlines for this category - improved colors for better visibility
+        headlines_frame = ctk.CTkFrame(self.frame, fg_color=HEADLINES_COLOR)
+        headlines_frame.pack(fill="x", padx=10)
+        self.headlines = KeyedRows(headlines_frame, HeadlineRow)
+
+        self.updated_label = ctk.CTkLabel(
+            self.frame,
+            text="",
+            font=ctk.CTkFont(size=10, slant="italic"),
+            text_color="gray",
+        )
+        self.updated_label.pack(anchor="e", padx=10, pady=(5, 10))
+        self.current = {}
+
+    def update(self, position, data):
+        category, headlines, fetched = data
+        configure_changed(self.title, self.current, text=f"{category} News")
+        # Keyed by rank, so fresh headlines only change label text
+        self.headlines.sync(enumerate(headlines[:3]))  # Limit to top 3
+        self.updated_label.configure(text=updated_text(fetched, "Sample headlines"))
+
+    def place(self, position):
+        self.frame.pack(fill="x", pady=10, anchor="w")
+
+    def forget(self):
+        self.frame.pack_forget()
+
+    def destroy(self):
+        self.frame.destroy()
+
+
+class NewsPanel(Panel):
+    def __init__(self, parent):
+        super().__init__(parent, fill="x")
+        # News section header
+        header = ctk.CTkLabel(
+            self.frame,
+            text="Your News Headlines",
+            font=ctk.CTkFont(size=24, weight="bold"),
+            text_color="#3a7ebf",
+        )
+
+        # Loading indicator
+        loading_frame = ctk.CTkFrame(self.frame)
+        loading_label = ctk.CTkLabel(
+            loading_frame,
+            text="Loading news headlines...",
+            font=ctk.CTkFont(size=14),
+        )
+        loading_label.pack(pady=10)
+
+        categories_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        self.categories = KeyedRows(categories_frame, CategoryBlock)
+
+        # Message when news is disabled
+        disabled_frame = ctk.CTkFrame(self.frame, fg_color="#f0f0f0", corner_radius=10)
+        disabled_label = ctk.CTkLabel(
+            disabled_frame,
+            text="News updates disabled.\nEnable them in your profile settings.",
+            font=ctk.CTkFont(size=16),
+            pady=20,
+            padx=20
+        )
+        disabled_label.pack()
+
+        header_options = {"anchor": "w", "pady": (0, 15)}
+        self.states = {
+            "loading": [(header, header_options), (loading_frame, {"fill": "x", "pady": 10})],
+            "headlines": [(header, header_options), (categories_frame, {"fill": "x"})],
+            "disabled": [(disabled_frame, {"pady": 20})],
+        }
+
+    def show_loading(self):
+        self.set_state("loading")
+
+    def show_disabled(self):
+        self.set_state("disabled")
+
+    def update(self, headlines, fetched=None):
+        """fetched maps each category to when its headlines were fetched (missing for sample data)"""
+        fetched = fetched or {}
+        self.categories.sync((category, (category, category_headlines, fetched.get(category)))
+                             for category, category_headlines in headlines.items())
+        self.set_state("headlines")
+
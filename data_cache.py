@@ -0,0 +1,131 @@
+"""
+Small thread-safe TTL cache for dashboard data (news headlines, stock quotes).
+Entries past their TTL are still returned as stale so the dashboard can show
+them straight away while a refresh runs (stale-while-revalidate). Keys being
+refreshed are tracked so the same data is never fetched twice at once, and
+the cache can be persisted to a JSON file so it survives restarts.
+"""
+import json
+import os
+import threading
+import time
+
+
+class DataCache:
+    def __init__(self, ttl, path=None, name="cache"):
+        self.ttl = ttl          # Seconds before an entry counts as stale
+        self.path = path        # JSON file the cache is persisted to, or None
+        self.name = name
+        self.entries = {}       # key -> {"value": ..., "fetched": timestamp}
+        self.in_flight = set()
+        self.lock = threading.Lock()
+        self.refreshed = threading.Condition(self.lock)
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.load()
+
+    def load(self):
+        """Read persisted entries; a missing or damaged file just means an empty cache"""
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "r") as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"[WARNING] Ignoring damaged {self.name} cache {self.path}: {e}")
+            self.entries = {}
+
+    def save(self):
+        if self.path is None:
+            return
+        with self.lock:
+            snapshot = json.dumps(self.entries)
+        try:
+            with open(self.path + ".tmp", "w") as f:
+                f.write(snapshot)
+            os.replace(self.path + ".tmp", self.path)
+        except OSError as e:
+            print(f"[WARNING] Could not save {self.name} cache: {e}")
+
+    def age(self, key):
+        """Seconds since a key was fetched, or None if it isn't cached"""
+        entry = self.entries.get(key)
+        return None if entry is None else time.time() - entry["fetched"]
+
+    def fetched(self, key):
+        """Time a key was fetched, or None if it isn't cached"""
+        entry = self.entries.get(key)
+        return None if entry is None else entry["fetched"]
+
+    def get(self, key):
+        """Cached value (fresh or stale) or None, counting hits, stale hits and misses"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if time.time() - entry["fetched"] > self.ttl:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            return entry["value"]
+
+    def peek(self, key):
+        """Cached value without touching the statistics"""
+        entry = self.entries.get(key)
+        return None if entry is None else entry["value"]
+
+    def put_many(self, values):
+        """Store several freshly fetched values and persist the cache once"""
+        now = time.time()
+        with self.lock:
+            for key, value in values.items():
+                self.entries[key] = {"value": value, "fetched": now}
+        self.save()
+
+    def stale_keys(self, keys):
+        """Keys that are missing or past their TTL"""
+        return [key for key in keys if self.age(key) is None or self.age(key) > self.ttl]
+
+    def begin_refresh(self, keys):
+        """Claim keys for fetching; returns only those nobody else is already fetching"""
+        with self.lock:
+            claimed = [key for key in dict.fromkeys(keys) if key not in self.in_flight]
+            self.in_flight.update(claimed)
+            if claimed:
+                self.refreshes += 1
+            return claimed
+
+    def end_refresh(self, keys):
+        with self.lock:
+            self.in_flight.difference_update(keys)
+            self.refreshed.notify_all()
+
+    def wait_for(self, keys, timeout=None):
+        """Block until none of the keys is being fetched; returns False on timeout"""
+        with self.lock:
+            return self.refreshed.wait_for(lambda: not self.in_flight.intersection(keys), timeout)
+
+    def stats(self):
+        ages = [self.age(key) for key in list(self.entries)]
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(ages),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            "refreshes": self.refreshes,
+            "oldest_age": max(ages) if ages else None,
+            "newest_age": min(ages) if ages else None,
+        }
+
+    def __str__(self):
+        s = self.stats()
+        oldest = f", oldest {s['oldest_age']:.0f}s" if s["oldest_age"] is not None else ""
+        return (f"{self.name}: {s['entries']} entries, {s['hits']} hits, {s['stale_hits']} stale, "
+                f"{s['misses']} misses, {s['refreshes']} refreshes{oldest}")
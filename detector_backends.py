@@ -0,0 +1,345 @@
+"""
+Face detector backends behind one interface:
+    detector.detect(image, imgsz=None) -> [(x1, y1, x2, y2, conf), ...]
+
+  ultralytics  the PyTorch checkpoint through ultralytics.YOLO (the original path)
+  onnx         the same network exported to ONNX and run with onnxruntime on the CPU
+  onnx-int8    the ONNX model statically quantized to INT8, calibrated on recorded frames
+
+    python detector_backends.py export   [--model yolov8n-face.pt]
+    python detector_backends.py quantize fixtures/alice fixtures/family [--frames 200]
+    python detector_backends.py compare  fixtures/alice fixtures/family [--backends ultralytics,onnx,onnx-int8]
+
+compare runs every backend over the fixture frames and reports latency plus how
+closely each one agrees with the PyTorch baseline (box recall/precision at IoU 0.5).
+
+TieredDetector puts the bundled Haar cascade in front of any of them: the cascade
+proposes face regions and YOLO only confirms those small crops, running on the
+whole frame only when the cascade keeps coming up short.
+"""
+import argparse
+import ast
+import glob
+import json
+import os
+import time
+import cv2
+import numpy as np
+
+from frame_pipeline import StageStats
+from face_tracker import box_iou
+from image_utils import letterbox, unletterbox_box, padded_crop
+from startup import lazy_import
+
+ultralytics = lazy_import("ultralytics")
+onnxruntime = lazy_import("onnxruntime")
+
+BACKENDS = ["ultralytics", "onnx", "onnx-int8"]
+DEFAULT_IMGSZ = 640     # ultralytics' default inference size
+NMS_IOU = 0.45
+MIN_CONFIDENCE = 0.1    # Boxes below this never reach the recognizer's own threshold
+STRIDE = 32             # Input sizes must be multiples of the network stride
+
+
+def onnx_path(model_path, int8=False):
+    """Where the exported (or quantized) model lives next to the checkpoint"""
+    return os.path.splitext(model_path)[0] + ("_int8.onnx" if int8 else ".onnx")
+
+
+class UltralyticsDetector:
+    def __init__(self, model_path):
+        self.model = ultralytics.YOLO(model_path)
+
+    def detect(self, image, imgsz=None):
+        if imgsz:
+            results = self.model(image, imgsz=imgsz, verbose=False)
+        else:
+            results = self.model(image)
+        return [tuple(box.xyxy[0].tolist() + [box.conf[0].item()]) for box in results[0].boxes]
+
+
+class OnnxDetector:
+    def __init__(self, path, threads=None):
+        """YOLOv8 ONNX model (exported with dynamic input size) on onnxruntime's CPU provider"""
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads or os.cpu_count() or 1
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+        # The export stores the class names; everything after them is keypoints (face landmarks)
+        names = self.session.get_modelmeta().custom_metadata_map.get("names", "{0: 'face'}")
+        self.classes = len(ast.literal_eval(names))
+
+    def preprocess(self, image, imgsz):
+        """Letterbox and normalise the way ultralytics does; returns the tensor and the transform"""
+        size = int(np.ceil((imgsz or DEFAULT_IMGSZ) / STRIDE) * STRIDE)
+        square, transform = letterbox(image[:, :, :3], size)
+        # ultralytics treats numpy input as BGR and flips it to RGB before inference
+        tensor = square[:, :, ::-1].transpose(2, 0, 1)[np.newaxis].astype(np.float32) / 255.0
+        return np.ascontiguousarray(tensor), transform
+
+    def detect(self, image, imgsz=None):
+        tensor, transform = self.preprocess(image, imgsz)
+        output = self.session.run(None, {self.input_name: tensor})[0][0].T  # (anchors, 4 + classes + keypoints)
+
+        scores = output[:, 4:4 + self.classes].max(axis=1)
+        keep = scores > MIN_CONFIDENCE
+        centers, scores = output[keep, :4], scores[keep]
+        if len(scores) == 0:
+            return []
+
+        # (cx, cy, w, h) -> (x, y, w, h) for NMS
+        boxes = np.column_stack([centers[:, 0] - centers[:, 2] / 2, centers[:, 1] - centers[:, 3] / 2,
+                                 centers[:, 2], centers[:, 3]])
+        indices = cv2.dnn.NMSBoxes(boxes.tolist(), scores.tolist(), MIN_CONFIDENCE, NMS_IOU)
+
+        detections = []
+        for i in np.array(indices).flatten():
+            x, y, w, h = boxes[i]
+            left, top, right, bottom = unletterbox_box((x, y, x + w, y + h), transform, image.shape)
+            detections.append((float(left), float(top), float(right), float(bottom), float(scores[i])))
+        return detections
+
+
+class HaarDetector:
+    def __init__(self, cascade_path, scale_factor=1.1, min_neighbors=5, min_size=40, downscale=0.5):
+        """OpenCV Haar cascade for frontal faces, run on a downscaled grayscale frame"""
+        if not hasattr(cv2, "CascadeClassifier"):
+            raise RuntimeError("this OpenCV build has no CascadeClassifier (moved to contrib in OpenCV 5)")
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise FileNotFoundError(f"Could not load Haar cascade {cascade_path}")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size      # Smallest face (full-resolution pixels) worth proposing
+        self.downscale = downscale
+
+    def detect(self, image):
+        """Candidate (left, top, right, bottom) face boxes in full-resolution pixels"""
+        gray = image if image.ndim == 2 else cv2.cvtColor(image[:, :, :3], cv2.COLOR_RGB2GRAY)
+        small = cv2.resize(gray, None, fx=self.downscale, fy=self.downscale, interpolation=cv2.INTER_AREA)
+        min_size = max(1, int(self.min_size * self.downscale))
+        faces = self.cascade.detectMultiScale(small, scaleFactor=self.scale_factor,
+                                              minNeighbors=self.min_neighbors, minSize=(min_size, min_size))
+        return [(int(x / self.downscale), int(y / self.downscale),
+                 int((x + w) / self.downscale), int((y + h) / self.downscale)) for x, y, w, h in faces]
+
+
+class TieredDetector:
+    def __init__(self, fast, confidence=0.5, roi_padding=0.5, confirm_size=160, max_fast_misses=10):
+        self.fast = fast                          # Cheap proposal tier (HaarDetector)
+        self.confidence = confidence              # YOLO confidence that confirms a candidate
+        self.roi_padding = roi_padding            # Context (x face size) kept around each candidate
+        self.confirm_size = confirm_size          # YOLO input size for candidate crops
+        self.max_fast_misses = max_fast_misses    # Cheap-tier misses before YOLO scans the whole frame
+        self.misses = 0
+        self.counts = {"haar": 0, "yolo": 0, "none": 0}
+        self.candidates = 0
+        self.confirmed = 0
+
+    def detect(self, image, detect_full, expected=0):
+        """Return (boxes, tier) where tier says which path produced them.
+        detect_full(image) and detect_full(crop, imgsz) run YOLO; expected is how many
+        faces are being tracked, so losing one of them also triggers a full scan."""
+        confirmed = []
+        for candidate in self.fast.detect(image):
+            self.candidates += 1
+            crop, (x0, y0) = padded_crop(image, [candidate], self.roi_padding)
+            for x1, y1, x2, y2, conf in detect_full(crop, self.confirm_size):
+                if conf > self.confidence:
+                    confirmed.append((x1 + x0, y1 + y0, x2 + x0, y2 + y0, conf))
+
+        # Candidates overlap when the cascade fires twice on one face; keep the best box
+        confirmed.sort(key=lambda box: box[4], reverse=True)
+        boxes = []
+        for box in confirmed:
+            if all(box_iou(box, kept) < NMS_IOU for kept in boxes):
+                boxes.append(box)
+        self.confirmed += len(boxes)
+
+        if boxes and len(boxes) >= expected:
+            self.misses = 0
+            self.counts["haar"] += 1
+            return boxes, "haar"
+
+        self.misses += 1
+        if expected > len(boxes) or self.misses >= self.max_fast_misses:
+            # The cascade missed a face we were tracking, or has found nothing for a while
+            self.misses = 0
+            self.counts["yolo"] += 1
+            return detect_full(image), "yolo"
+
+        self.counts["none"] += 1
+        return boxes, "haar"
+
+    def summary(self):
+        frames = sum(self.counts.values())
+        return {
+            "frames": dict(self.counts),
+            "fast_tier_fraction": (self.counts["haar"] + self.counts["none"]) / frames if frames else 0.0,
+            "candidates": self.candidates,
+            "confirmed": self.confirmed,
+        }
+
+    def __str__(self):
+        s = self.summary()
+        return (f"{s['fast_tier_fraction'] * 100:.0f}% of detections from the cascade tier, "
+                f"{s['frames']['yolo']} full YOLO scans, {s['confirmed']}/{s['candidates']} candidates confirmed")
+
+
+def create_detector(backend, model_path):
+    """Build the configured backend, exporting the ONNX model on first use if needed"""
+    if backend == "ultralytics":
+        return UltralyticsDetector(model_path)
+    if backend == "onnx":
+        path = onnx_path(model_path)
+        if not os.path.exists(path):
+            print(f"[INFO] {path} not found, exporting it from {model_path}...")
+            export_onnx(model_path)
+        return OnnxDetector(path)
+    if backend == "onnx-int8":
+        path = onnx_path(model_path, int8=True)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found; run: python detector_backends.py quantize <fixture dirs>")
+        return OnnxDetector(path)
+    raise ValueError(f"Unknown detector backend {backend!r} (expected one of {', '.join(BACKENDS)})")
+
+
+def export_onnx(model_path):
+    """Export the PyTorch checkpoint to ONNX with a dynamic input size"""
+    exported = ultralytics.YOLO(model_path).export(format="onnx", dynamic=True, simplify=True)
+    path = onnx_path(model_path)
+    if os.path.abspath(exported) != os.path.abspath(path):
+        os.replace(exported, path)
+    print(f"[INFO] Exported {path}")
+    return path
+
+
+def fixture_frames(fixture_dirs, limit=None):
+    """Frame paths of recorded fixtures, in order"""
+    paths = []
+    for fixture in fixture_dirs:
+        paths += sorted(glob.glob(os.path.join(fixture, "*.jpg")) + glob.glob(os.path.join(fixture, "*.png")))
+    return paths[:limit] if limit else paths
+
+
+def quantize_int8(model_path, fixture_dirs, frames=200, imgsz=DEFAULT_IMGSZ):
+    """Statically quantize the ONNX model to INT8, calibrating activations on recorded frames"""
+    from onnxruntime import quantization
+
+    source = onnx_path(model_path)
+    if not os.path.exists(source):
+        export_onnx(model_path)
+    paths = fixture_frames(fixture_dirs, frames)
+    if not paths:
+        raise ValueError("No calibration frames found in the given fixtures")
+
+    class FrameReader(quantization.CalibrationDataReader):
+        def __init__(self):
+            self.session_input = onnxruntime.InferenceSession(source, providers=["CPUExecutionProvider"]) \
+                .get_inputs()[0].name
+            self.paths = iter(paths)
+
+        def get_next(self):
+            for path in self.paths:
+                image = cv2.imread(path)
+                if image is not None:
+                    square, _ = letterbox(image, imgsz)
+                    tensor = square[:, :, ::-1].transpose(2, 0, 1)[np.newaxis].astype(np.float32) / 255.0
+                    return {self.session_input: np.ascontiguousarray(tensor)}
+            return None
+
+    output = onnx_path(model_path, int8=True)
+    print(f"[INFO] Calibrating INT8 model on {len(paths)} frames...")
+    quantization.quantize_static(source, output, FrameReader(),
+                                 quant_format=quantization.QuantFormat.QDQ,
+                                 per_channel=True,
+                                 weight_type=quantization.QuantType.QInt8,
+                                 activation_type=quantization.QuantType.QUInt8)
+    print(f"[INFO] Quantized model saved to {output}")
+    return output
+
+
+def agreement(baseline, detections, confidence, iou=0.5):
+    """Greedy IoU matching of one frame's boxes against the baseline's; returns (matched, baseline, found)"""
+    reference = [box[:4] for box in baseline if box[4] > confidence]
+    candidates = [box[:4] for box in detections if box[4] > confidence]
+    matched = 0
+    for box in candidates:
+        overlaps = [box_iou(box, ref) for ref in reference]
+        if overlaps and max(overlaps) >= iou:
+            reference.pop(int(np.argmax(overlaps)))
+            matched += 1
+    return matched, matched + len(reference), len(candidates)
+
+
+def compare(model_path, fixture_dirs, backends=BACKENDS, imgsz=None, confidence=0.5):
+    """Latency of each backend and its agreement with the PyTorch baseline on recorded frames"""
+    frames = [image for image in (cv2.imread(path) for path in fixture_frames(fixture_dirs)) if image is not None]
+    if not frames:
+        raise ValueError("No frames found in the given fixtures")
+
+    outputs = {}
+    results = {}
+    for backend in backends:
+        try:
+            detector = create_detector(backend, model_path)
+        except Exception as e:
+            print(f"[WARNING] Skipping {backend}: {e}")
+            continue
+        detector.detect(frames[0], imgsz)  # Warm-up run
+        stats = StageStats(backend, window=None)
+        outputs[backend] = []
+        for frame in frames:
+            start = time.perf_counter()
+            outputs[backend].append(detector.detect(frame, imgsz))
+            stats.record(time.perf_counter() - start)
+        results[backend] = {"latency": stats.summary()}
+        print(f"[INFO] {stats}")
+
+    if "ultralytics" in outputs:
+        for backend, detections in outputs.items():
+            matched = expected = found = 0
+            for reference, boxes in zip(outputs["ultralytics"], detections):
+                m, e, f = agreement(reference, boxes, confidence)
+                matched, expected, found = matched + m, expected + e, found + f
+            results[backend]["agreement"] = {
+                "recall": matched / expected if expected else 1.0,
+                "precision": matched / found if found else 1.0,
+                "baseline_boxes": expected,
+                "boxes": found,
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Face detector backends")
+    parser.add_argument("--model", default="/home/tusharg/yolov8n-face.pt", help="PyTorch checkpoint")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("export", help="export the checkpoint to ONNX")
+    quantize = commands.add_parser("quantize", help="build the INT8 model from recorded frames")
+    quantize.add_argument("fixtures", nargs="+")
+    quantize.add_argument("--frames", type=int, default=200, help="calibration frames to use")
+    quantize.add_argument("--imgsz", type=int, default=DEFAULT_IMGSZ)
+    check = commands.add_parser("compare", help="latency and accuracy of each backend against PyTorch")
+    check.add_argument("fixtures", nargs="+")
+    check.add_argument("--backends", type=lambda s: s.split(","), default=BACKENDS)
+    check.add_argument("--imgsz", type=int, default=None)
+    check.add_argument("--output", default="detector_comparison.json")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_onnx(args.model)
+    elif args.command == "quantize":
+        quantize_int8(args.model, args.fixtures, args.frames, args.imgsz)
+    elif args.command == "compare":
+        results = compare(args.model, args.fixtures, args.backends, args.imgsz)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"[INFO] Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
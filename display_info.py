@@ -2,11 +2,16 @@ import json
 import customtkinter as ctk
 from tkinter import messagebox
 import threading
-import requests
-from datetime import datetime
-import yfinance as tf  # Add this import for stock data
+import asyncio
 import current_user  # Import the current_user module
+import user_events
 import time
+from data_cache import DataCache
+from quote_service import QuoteService
+from fetch_engine import get_engine
+from prefetcher import Prefetcher
+from dashboard_panels import NewsPanel, StockPanel, TodoPanel
+
 
 # Set appearance mode and default color theme
 ctk.set_appearance_mode("System")  # Modes: "System" (standard), "Dark", "Light"
@@ -47,99 +52,75 @@ SAMPLE_STOCKS = {
     "META": {"price": "475.89", "change": "+8.45", "percent": "+1.81%"}
 }
 
-# Function to fetch news headlines from News API
-def fetch_news_headlines(categories):
-    headlines = {}
-    API_KEY = "e5ead44f35a544138f2fb5a2993bca15"
+# Headlines change slowly, so categories are cached (on disk, shared by all users)
+NEWS_TTL = 15 * 60  # Seconds before cached headlines are refreshed
+NEWS_CACHE_FILE = "news_cache.json"
+news_cache = DataCache(NEWS_TTL, NEWS_CACHE_FILE, "news")
 
-    def fetch_news_for_category(category):
-        try:
-            query = category.lower()
-            url = f"https://newsapi.org/v2/top-headlines?country=us&category={query}&apiKey={API_KEY}"
-            response = requests.get(url, timeout=5)  # Set a timeout for the request
+NEWS_DEADLINE = 10  # Seconds allowed for all categories of one refresh, retries included
+
+# Function to fetch the headlines of one category from News API
+def fetch_news_for_category(category):
+    """Top 3 headlines of a category; raises on failure so the fetch engine can retry"""
+    API_KEY = "e5ead44f35a544138f2fb5a2993bca15"
+    query = category.lower()
+    url = f"https://newsapi.org/v2/top-headlines?country=us&category={query}&apiKey={API_KEY}"
+    response = get_engine().session.get(url, timeout=5)  # Pooled keep-alive connection
 
-            if response.status_code == 200:
-                news_data = response.json()
-                articles = news_data.get('articles', [])
-                return [article['title'] for article in articles[:3]]  # Get top 3 headlines
-            else:
-                print(f"API request failed for {category} with status code {response.status_code}")
-        except Exception as e:
-            print(f"Error fetching {category} news: {e}")
-        return SAMPLE_NEWS.get(category, ["No headlines available"])  # Fallback to sample data
+    if response.status_code != 200:
+        raise RuntimeError(f"API request failed for {category} with status code {response.status_code}")
+    news_data = response.json()
+    articles = news_data.get('articles', [])
+    return [article['title'] for article in articles[:3]]  # Get top 3 headlines
 
-    # Use threading to enforce a 10-second timeout for all categories
-    threads = []
-    results = {}
+# Function to refresh stale headlines in the cache
+async def refresh_news(categories):
+    """Fetch the stale categories nobody else is already fetching and store them in the cache"""
+    to_fetch = news_cache.begin_refresh(news_cache.stale_keys(categories))
+    if not to_fetch:
+        return
+    try:
+        results = await get_engine().gather("newsapi", fetch_news_for_category, to_fetch, deadline=NEWS_DEADLINE)
+        news_cache.put_many({category: headlines for category, headlines in results.items()
+                             if headlines is not None})
+    finally:
+        news_cache.end_refresh(to_fetch)
 
-    def fetch_and_store(category):
-        results[category] = fetch_news_for_category(category)
+# Function to get headlines through the cache (stale-while-revalidate)
+def get_news_headlines(categories):
+    """Return (cached, refresh): cached headlines for every category (None if some were never
+    fetched) and a future with the full set once stale or missing categories are refreshed (or None)."""
+    cached = {category: news_cache.get(category) for category in categories}
+    missing = [category for category, headlines in cached.items() if headlines is None]
 
-    for category in categories:
-        thread = threading.Thread(target=fetch_and_store, args=(category,))
-        threads.append(thread)
-        thread.start()
+    async def refresh():
+        await refresh_news(categories)
+        # Somebody else (e.g. the prefetcher) may be fetching the rest already; wait for them
+        await asyncio.to_thread(news_cache.wait_for, categories, 15)
+        return cached_news(categories)
 
-    # Wait for threads to complete or timeout after 10 seconds
-    start_time = time.time()
-    for thread in threads:
-        thread.join(timeout=10 - (time.time() - start_time))
+    future = get_engine().run(refresh()) if news_cache.stale_keys(categories) else None
+    return (None if missing else cached), future
 
-    # Ensure all categories have data, fallback to sample if not
-    for category in categories:
-        if category not in results:
-            results[category] = SAMPLE_NEWS.get(category, ["No headlines available"])
+def cached_news(categories):
+    """Cached headlines for the categories, sample headlines where there are none"""
+    return {category: news_cache.peek(category) or SAMPLE_NEWS.get(category, ["No headlines available"])
+            for category in categories}
 
-    return results
+# Quotes for every profile are fetched in batches and shared through one cache
+quote_service = QuoteService(fallback=SAMPLE_STOCKS)
 
-# Function to fetch stock data using yfinance
+# Function to fetch stock data (batched, cached; sample data only for tickers never fetched)
 def fetch_stock_data(tickers):
-    stock_data = {}
-    
-    for ticker in tickers:
-        try:
-            # Try to get real-time data from Yahoo Finance
-            stock = tf.Ticker(ticker)
-            info = stock.info
-            
-            # Get the current price
-            current_price = info.get('currentPrice', info.get('regularMarketPrice', 0))
-            if current_price is None:
-                current_price = 0
-                
-            # Get the previous close price to calculate change
-            prev_close = info.get('previousClose', current_price)
-            if prev_close is None or prev_close == 0:
-                prev_close = current_price
-                
-            # Calculate change and percent change
-            change = current_price - prev_close
-            percent_change = (change / prev_close) * 100 if prev_close != 0 else 0
-            
-            # Format the data
-            stock_data[ticker] = {
-                "price": f"{current_price:.2f}",
-                "change": f"{change:.2f}",
-                "percent": f"{percent_change:.2f}%",
-                "name": info.get('shortName', ticker),
-                "currency": info.get('currency', 'USD')
-            }
-            
-        except Exception as e:
-            print(f"Error fetching data for {ticker}: {e}")
-            # Fallback to sample data
-            if ticker in SAMPLE_STOCKS:
-                stock_data[ticker] = SAMPLE_STOCKS[ticker]
-            else:
-                stock_data[ticker] = {
-                    "price": "N/A", 
-                    "change": "0.00", 
-                    "percent": "0.00%",
-                    "name": ticker,
-                    "currency": "USD"
-                }
-    
-    return stock_data
+    return quote_service.get_quotes(tickers)
+
+# Functions the prefetcher uses to warm the caches without waiting for the result
+def prefetch_news(categories):
+    get_engine().run(refresh_news(categories))
+
+def prefetch_quotes(tickers):
+    quote_service.watch(tickers)
+    get_engine().submit("quotes", quote_service.refresh, tickers, deadline=20, retries=0)
 
 # Function to find a person by name in the people.json data
 def find_person_by_name(people_data, name):
@@ -158,6 +139,9 @@ def load_user_data():
         with open('people.json', 'r') as file:
             people_data = json.load(file)
         
+        # Every profile's tickers are refreshed together in one batched quote fetch
+        quote_service.watch_profiles(people_data)
+        
         # Find the person that matches the current user
         person = find_person_by_name(people_data, current_name)
         
@@ -175,14 +159,20 @@ def load_user_data():
         return None
 
 class DashboardApp:
-    def __init__(self, root):
+    def __init__(self, root, local_events=False):
         self.root = root
+        self.local_events = local_events  # Listen to in-process events (when run by the supervisor)
         self.root.title("Personal Dashboard")
         self.root.geometry("1920x1080")
         
         # Initialize main frames
         self.init_main_frames()
         
+        # Keep every profile's news and stocks warm so a new user sees filled panels at once
+        self.prefetcher = Prefetcher(prefetch_news, prefetch_quotes,
+                                     report=lambda: f"{news_cache}; {quote_service}")
+        self.prefetcher.start()
+        
         # Load initial user data
         self.current_user = None
         self.load_and_display_user()
@@ -227,16 +217,35 @@ class DashboardApp:
             corner_radius=8
         )
         self.refresh_button.pack(side="right", padx=20)
+        
+        # Welcome message and gender/age, updated in place when the user changes
+        self.welcome_label = ctk.CTkLabel(
+            self.welcome_frame,
+            text="",
+            font=ctk.CTkFont(family="Arial", size=32, weight="bold"),
+            text_color="white",
+            pady=15
+        )
+        self.welcome_label.pack()
+        
+        self.gender_age_label = ctk.CTkLabel(
+            self.gender_age_frame,
+            text="",
+            font=ctk.CTkFont(size=26, weight="bold"),
+            text_color="#3a7ebf",
+        )
+        self.gender_age_label.pack(anchor="center")
+        
+        # Panels are built once and only updated afterwards (the to-do list always comes first)
+        self.news_panel = NewsPanel(self.left_container)
+        self.todo_panel = TodoPanel(self.right_container)
+        self.todo_panel.show()
+        self.stock_panel = StockPanel(self.right_container)
     
     def refresh_dashboard(self):
         """Force refresh all dynamic content"""
         self.load_and_display_user()
     
-    def clear_container(self, container):
-        """Clear all widgets from a container"""
-        for widget in container.winfo_children():
-            widget.destroy()
-    
     def load_and_display_user(self):
         """Load user data and update the UI"""
         # Load current user data
@@ -244,15 +253,7 @@ class DashboardApp:
         
         if not person:
             # Show error message if data can't be loaded
-            self.clear_container(self.welcome_frame)
-            error_label = ctk.CTkLabel(
-                self.welcome_frame,
-                text="Error loading user data",
-                font=ctk.CTkFont(family="Arial", size=32, weight="bold"),
-                text_color="white",
-                pady=15
-            )
-            error_label.pack()
+            self.welcome_label.configure(text="Error loading user data")
             return
         
         # Store current user name
@@ -274,389 +275,112 @@ class DashboardApp:
         
         # If new user, update welcome message and gender/age info
         if is_new_user:
-            # Update welcome message
-            self.clear_container(self.welcome_frame)
-            welcome_label = ctk.CTkLabel(
-                self.welcome_frame,
-                text=f"Welcome, {name}!",
-                font=ctk.CTkFont(family="Arial", size=32, weight="bold"),
-                text_color="white",
-                pady=15
-            )
-            welcome_label.pack()
-            
-            # Update gender and age display
-            self.clear_container(self.gender_age_frame)
-            gender_age_text = f"{gender}, {age} years old"
-            gender_age_label = ctk.CTkLabel(
-                self.gender_age_frame,
-                text=gender_age_text,
-                font=ctk.CTkFont(size=26, weight="bold"),
-                text_color="#3a7ebf",
-            )
-            gender_age_label.pack(anchor="center")
-            
-            # Clear existing content
-            self.clear_container(self.left_container)
-            self.clear_container(self.right_container)
-            
-            # Add To-Do List
-            self.display_todo_list(todo_list)
+            self.welcome_label.configure(text=f"Welcome, {name}!")
+            self.gender_age_label.configure(text=f"{gender}, {age} years old")
+        
+        # Panels diff against what they show, so updating them on every refresh is cheap
+        self.display_todo_list(todo_list)
         
-        # Always update dynamic content regardless of user change
         # Add Stock Market Section
         if stock_interest and stock_tickers:
-            # Clear right container only below the todo list
-            for widget in self.right_container.winfo_children():
-                if widget.winfo_y() > 300:  # Approximate position after todo list
-                    widget.destroy()
             self.display_stocks(stock_tickers)
+        else:
+            self.stock_panel.hide()
         
         # Add News Section
         if news_interest and news_categories:
-            self.clear_container(self.left_container)
             self.display_news(news_categories)
         elif not news_interest:
-            self.clear_container(self.left_container)
             self.display_no_news_message()
+        else:
+            self.news_panel.hide()
     
     def display_todo_list(self, todo_list):
         """Display the to-do list"""
-        # Title for the sticky note
-        todo_title = ctk.CTkLabel(
-            self.right_container,
-            text="My To-Do List",
-            font=ctk.CTkFont(family="Comic Sans MS", size=24, weight="bold"),
-            text_color="#3a7ebf",
-        )
-        todo_title.pack(anchor="center", pady=(0, 20))
-        
-        if todo_list:
-            # Create the sticky note with yellow background
-            sticky_note = ctk.CTkFrame(
-                self.right_container, 
-                fg_color="#fff9b1",  # Yellow sticky note color
-                corner_radius=2,
-                border_width=1,
-                border_color="#e0e0e0",  # Light border
-                width=500,  # Fixed width for square shape
-                height=250  # Height
-            )
-            sticky_note.pack(pady=20)
-            
-            # Add padding inside the note
-            note_padding = ctk.CTkFrame(sticky_note, fg_color="#fff9b1")
-            note_padding.pack(fill="both", expand=True, padx=30, pady=20)
-            
-            # Title inside note
-            note_header = ctk.CTkLabel(
-                note_padding,
-                text="Tasks:",
-                font=ctk.CTkFont(family="Comic Sans MS", size=18, weight="bold"),
-                text_color="#333333",
-                fg_color="#fff9b1",
-            )
-            note_header.pack(anchor="w", pady=(0, 5))
-            
-            # Add a separator that looks like a pencil line
-            separator = ctk.CTkFrame(note_padding, height=2, fg_color="#cccccc")
-            separator.pack(fill="x", pady=5)
-            
-            # Create a scrollable frame for tasks
-            tasks_scrollable = ctk.CTkScrollableFrame(note_padding, fg_color="#fff9b1", 
-                                                     height=150, width=400)
-            tasks_scrollable.pack(fill="both", expand=True)
-            
-            # List each task with bullet points
-            for i, item in enumerate(todo_list):
-                task_frame = ctk.CTkFrame(tasks_scrollable, fg_color="#fff9b1")
-                task_frame.pack(fill="x", pady=3)
-                
-                bullet = ctk.CTkLabel(
-                    task_frame,
-                    text="•",
-                    font=ctk.CTkFont(family="Comic Sans MS", size=16),
-                    text_color="#333333",
-                    fg_color="#fff9b1",
-                    width=20
-                )
-                bullet.pack(side="left")
-                
-                todo_item = ctk.CTkLabel(
-                    task_frame,
-                    text=f"{item}",
-                    font=ctk.CTkFont(family="Comic Sans MS", size=16, slant="italic"),
-                    text_color="#333333",
-                    fg_color="#fff9b1",
-                    anchor="w"
-                )
-                todo_item.pack(side="left", fill="x", expand=True)
-        else:
-            # If no tasks, show an empty sticky note
-            empty_note = ctk.CTkFrame(
-                self.right_container, 
-                fg_color="#fff9b1", 
-                corner_radius=2,
-                width=500,  # Fixed width for square shape
-                height=250   # Height
-            )
-            empty_note.pack(pady=20)
-            empty_note.pack_propagate(False)  # Prevent children from changing size
-            
-            empty_message = ctk.CTkLabel(
-                empty_note,
-                text="No tasks yet. Enjoy your free time!",
-                font=ctk.CTkFont(family="Comic Sans MS", size=18, slant="italic"),
-                text_color="#333333",
-                fg_color="#fff9b1",
-            )
-            empty_message.pack(expand=True)
+        self.todo_panel.update(todo_list)
     
     def display_stocks(self, stock_tickers):
         """Display the stock information"""
-        # Stock section header
-        stock_title = ctk.CTkLabel(
-            self.right_container,
-            text="Stock Portfolio",
-            font=ctk.CTkFont(size=24, weight="bold"),
-            text_color="#3a7ebf",
-        )
-        stock_title.pack(anchor="center", pady=(40, 20))
-        
-        # Loading indicator for stocks
-        stock_loading_frame = ctk.CTkFrame(self.right_container)
-        stock_loading_frame.pack(fill="x", pady=10)
+        self.stock_panel.show()
         
-        stock_loading_label = ctk.CTkLabel(
-            stock_loading_frame,
-            text="Loading stock data...",
-            font=ctk.CTkFont(size=14),
-        )
-        stock_loading_label.pack(pady=10)
+        # Only the latest call may draw; an older fetch landing late is ignored
+        self.stock_generation = getattr(self, "stock_generation", 0) + 1
+        generation = self.stock_generation
         
-        # Function to update UI with stock data
         def update_stock_ui(stock_data):
-            # Remove loading indicator
-            stock_loading_frame.destroy()
-            
-            # Create main stock display frame
-            stock_display = ctk.CTkFrame(self.right_container, fg_color="#e6ffe6", corner_radius=8)
-            stock_display.pack(fill="x", pady=10)
-            
-            # Add column headers
-            header_frame = ctk.CTkFrame(stock_display, fg_color="#006600")
-            header_frame.pack(fill="x", padx=10, pady=(10, 0))
-            
-            # Create header grid
-            header_frame.grid_columnconfigure(0, weight=2)
-            header_frame.grid_columnconfigure(1, weight=1)
-            header_frame.grid_columnconfigure(2, weight=1)
-            
-            # Header labels
-            symbol_header = ctk.CTkLabel(
-                header_frame,
-                text="Symbol",
-                font=ctk.CTkFont(size=16, weight="bold"),
-                text_color="white",
-            )
-            symbol_header.grid(row=0, column=0, padx=5, pady=5, sticky="w")
-            
-            price_header = ctk.CTkLabel(
-                header_frame,
-                text="Price",
-                font=ctk.CTkFont(size=16, weight="bold"),
-                text_color="white",
-            )
-            price_header.grid(row=0, column=1, padx=5, pady=5, sticky="w")
-            
-            change_header = ctk.CTkLabel(
-                header_frame,
-                text="Change",
-                font=ctk.CTkFont(size=16, weight="bold"),
-                text_color="white",
-            )
-            change_header.grid(row=0, column=2, padx=5, pady=5, sticky="w")
-            
-            # Create a container for stock rows
-            stocks_container = ctk.CTkFrame(stock_display, fg_color="#e6ffe6")
-            stocks_container.pack(fill="x", padx=10, pady=10)
-            
-            # Set up column configuration
-            stocks_container.grid_columnconfigure(0, weight=2)
-            stocks_container.grid_columnconfigure(1, weight=1)
-            stocks_container.grid_columnconfigure(2, weight=1)
-            
-            # Add each stock
-            for i, ticker in enumerate(stock_tickers):
-                if ticker in stock_data:
-                    data = stock_data[ticker]
-                    
-                    # Alternate row colors
-                    row_color = "#d1e8d1" if i % 2 == 0 else "#e6ffe6"
-                    
-                    # Symbol and name
-                    symbol_label = ctk.CTkLabel(
-                        stocks_container,
-                        text=f"{ticker}\n{data.get('name', '')}",
-                        font=ctk.CTkFont(size=14, weight="bold"),
-                        text_color="#003300",
-                        fg_color=row_color,
-                    )
-                    symbol_label.grid(row=i, column=0, padx=5, pady=8, sticky="w")
-                    
-                    # Price
-                    price_label = ctk.CTkLabel(
-                        stocks_container,
-                        text=f"{data['price']} {data.get('currency', 'USD')}",
-                        font=ctk.CTkFont(size=14),
-                        text_color="#003300",
-                        fg_color=row_color,
-                    )
-                    price_label.grid(row=i, column=1, padx=5, pady=8, sticky="w")
-                    
-                    # Change amount and percentage
-                    change = float(data['change'].replace('+', '').replace('-', ''))
-                    is_positive = '-' not in data['change']
-                    
-                    change_color = "#007700" if is_positive else "#CC0000"
-                    change_prefix = "+" if is_positive else "-"
-                    
-                    if data['change'] == "0.00":
-                        change_prefix = ""
-                        change_color = "#666666"
-                    
-                    change_label = ctk.CTkLabel(
-                        stocks_container,
-                        text=f"{change_prefix}${change:.2f} ({data['percent']})",
-                        font=ctk.CTkFont(size=14, weight="bold"),
-                        text_color=change_color,
-                        fg_color=row_color,
-                    )
-                    change_label.grid(row=i, column=2, padx=5, pady=8, sticky="w")
-            
-            # Add last updated time
-            now = datetime.now().strftime("%H:%M:%S")
-            stocks_updated = ctk.CTkLabel(
-                stock_display,
-                text=f"Updated at {now}",
-                font=ctk.CTkFont(size=10, slant="italic"),
-                text_color="gray",
-                fg_color="#e6ffe6",
-            )
-            stocks_updated.pack(anchor="e", padx=10, pady=(0, 10))
-        
-        # Fetch stock data in separate thread
-        def fetch_stocks_thread():
-            stock_data = fetch_stock_data(stock_tickers)
-            self.root.after(0, lambda: update_stock_ui(stock_data))
-        
-        threading.Thread(target=fetch_stocks_thread, daemon=True).start()
+            if generation == self.stock_generation:
+                self.stock_panel.update(stock_tickers, stock_data, quote_service.fetched(stock_tickers))
+        
+        # Show cached (e.g. prefetched) quotes at once, the loading indicator if some are missing
+        cached = quote_service.cached_quotes(stock_tickers)
+        if len(cached) == len(set(stock_tickers)):
+            update_stock_ui(cached)
+        else:
+            self.stock_panel.show_loading()
+        
+        # Fetch stock data on the fetch engine; the result comes back on the Tk thread
+        engine = get_engine()
+        engine.deliver(engine.submit("quotes", fetch_stock_data, stock_tickers, deadline=20, retries=0),
+                       self.root, update_stock_ui, fallback=quote_service.peek_quotes(stock_tickers))
     
     def display_news(self, news_categories):
         """Display news headlines"""
-        # News section header
-        news_header = ctk.CTkLabel(
-            self.left_container,
-            text="Your News Headlines",
-            font=ctk.CTkFont(size=24, weight="bold"),
-            text_color="#3a7ebf",
-        )
-        news_header.pack(anchor="w", pady=(0, 15))
-        
-        # Loading indicator
-        loading_frame = ctk.CTkFrame(self.left_container)
-        loading_frame.pack(fill="x", pady=10)
+        self.news_panel.show()
         
-        loading_label = ctk.CTkLabel(
-            loading_frame,
-            text="Loading news headlines...",
-            font=ctk.CTkFont(size=14),
-        )
-        loading_label.pack(pady=10)
+        # Only the latest call may draw; an older refresh landing late is ignored
+        self.news_generation = getattr(self, "news_generation", 0) + 1
+        generation = self.news_generation
         
-        # Dictionary to store news frames for each category
-        news_frames = {}
-        
-        # Function to update UI with news headlines
         def update_news_ui(headlines):
-            # Remove loading indicator
-            loading_frame.destroy()
-            
-            # Display headlines for each category
-            for category, category_headlines in headlines.items():
-                # Create a frame for this category
-                category_frame = ctk.CTkFrame(self.left_container)
-                category_frame.pack(fill="x", pady=10, anchor="w")
-                
-                # Category title
-                category_title = ctk.CTkLabel(
-                    category_frame,
-                    text=f"{category} News",
-                    font=ctk.CTkFont(size=18, weight="bold"),
-                    text_color="white",
-                    fg_color="#3a7ebf",
-                    corner_radius=8,
-                )
-                category_title.pack(fill="x", pady=(0, 10), padx=10)
-                
-                # Headlines for this category - improved colors for better visibility
-                headlines_frame = ctk.CTkFrame(category_frame, fg_color="#e1effe")
-                headlines_frame.pack(fill="x", padx=10)
-                
-                for i, headline in enumerate(category_headlines[:3]):  # Limit to top 3
-                    # Different color backgrounds for alternating headlines
-                    bg_color = "#d1e5ff" if i % 2 == 0 else "#e1effe"
-                    
-                    headline_frame = ctk.CTkFrame(headlines_frame, fg_color=bg_color)
-                    headline_frame.pack(fill="x", padx=5, pady=3)
-                    
-                    headline_label = ctk.CTkLabel(
-                        headline_frame,
-                        text=f"{i+1}. {headline}",
-                        font=ctk.CTkFont(size=14, weight="bold"),
-                        text_color="#00366e",
-                        fg_color=bg_color,
-                        anchor="w",
-                        justify="left",
-                        wraplength=600  # Allow wrapping for long headlines
-                    )
-                    headline_label.pack(anchor="w", pady=5, padx=10, fill="x")
-                
-                # Add a "last updated" timestamp
-                now = datetime.now().strftime("%H:%M:%S")
-                updated_label = ctk.CTkLabel(
-                    category_frame,
-                    text=f"Updated at {now}",
-                    font=ctk.CTkFont(size=10, slant="italic"),
-                    text_color="gray",
-                )
-                updated_label.pack(anchor="e", padx=10, pady=(5, 10))
-                
-                # Save reference to prevent garbage collection
-                news_frames[category] = category_frame
+            if generation == self.news_generation:
+                self.news_panel.update(headlines, {category: news_cache.fetched(category) for category in headlines})
         
-        # Fetch news in separate thread to keep UI responsive
-        def fetch_news_thread():
-            headlines = fetch_news_headlines(news_categories)
-            self.root.after(0, lambda: update_news_ui(headlines))
-        
-        threading.Thread(target=fetch_news_thread, daemon=True).start()
+        # Show cached headlines at once; fresh ones replace them when the background refresh lands
+        cached, refresh = get_news_headlines(news_categories)
+        if cached is not None:
+            update_news_ui(cached)
+        else:
+            self.news_panel.show_loading()
+        if refresh is not None:
+            get_engine().deliver(refresh, self.root, update_news_ui, fallback=cached_news(news_categories))
     
     def display_no_news_message(self):
         """Display message when news is disabled"""
-        no_news_frame = ctk.CTkFrame(self.left_container, fg_color="#f0f0f0", corner_radius=10)
-        no_news_frame.pack(pady=20)
-        
-        no_news_label = ctk.CTkLabel(
-            no_news_frame,
-            text="News updates disabled.\nEnable them in your profile settings.",
-            font=ctk.CTkFont(size=16),
-            pady=20,
-            padx=20
-        )
-        no_news_label.pack()
+        self.news_panel.show()
+        self.news_panel.show_disabled()
     
     def start_user_monitor(self):
+        """Subscribe to user change events, falling back to polling current_user"""
+        refresh_interval = 30000  # Refresh every 30 seconds
+        
+        def periodic_refresh():
+            self.load_and_display_user()
+            self.root.after(refresh_interval, periodic_refresh)
+        
+        def on_event(event):
+            # Called on the listener thread; hand the change to the Tk main loop
+            if event.get("type") == "user" and event.get("name") != self.current_user:
+                self.root.after(0, self.load_and_display_user)
+            # A face the recognizer hasn't confirmed yet: fetch that person's data ahead of time
+            elif event.get("type") == "candidate" and event.get("name") != self.current_user:
+                self.prefetcher.on_candidate(event.get("name"))
+        
+        if self.local_events:
+            user_events.subscribe(on_event)
+            self.root.after(refresh_interval, periodic_refresh)
+            return
+        
+        try:
+            self.user_subscriber = user_events.Subscriber("dashboard")
+        except OSError as e:
+            print(f"User events unavailable ({e}), polling for user changes")
+            self.start_user_polling()
+            return
+        
+        self.user_subscriber.listen(on_event)
+        self.root.after(refresh_interval, periodic_refresh)
+    
+    def start_user_polling(self):
         """Start the monitoring thread to detect user changes"""
         def monitor_thread():
             last_user = None
@@ -0,0 +1,29 @@
+"""
+Batched 128-d face encoding on top of the dlib models bundled with face_recognition.
+face_recognition.face_encodings runs the ResNet encoder once per face; dlib can
+also take every face of an image in one call, which shares the image conversion
+and runs the network on all face chips together.
+"""
+import numpy as np
+from startup import lazy_import
+
+# face_recognition.api loads its dlib models at import time, so defer it to the first encode
+dlib = lazy_import("dlib")
+api = lazy_import("face_recognition.api")
+
+
+def encode_faces(image, locations, num_jitters=1, model="small"):
+    """Return one 128-d encoding per (top, right, bottom, left) location in an RGB image.
+    Defaults match face_recognition.face_encodings so encodings stay comparable with the gallery."""
+    if len(locations) == 0:
+        return []
+
+    predictor = api.pose_predictor_5_point if model == "small" else api.pose_predictor_68_point
+
+    # Landmarks for every face, gathered into one dlib batch
+    shapes = dlib.full_object_detections()
+    for top, right, bottom, left in locations:
+        shapes.append(predictor(image, dlib.rectangle(left, top, right, bottom)))
+
+    descriptors = api.face_encoder.compute_face_descriptor(image, shapes, num_jitters)
+    return [np.array(descriptor) for descriptor in descriptors]
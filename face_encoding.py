@@ -1,161 +1,373 @@
-import face_recognition
-import pickle
 import cv2
 import os
+import json
 import time
+import hashlib
+import gc
+import multiprocessing
+from collections import deque
+from face_encoder import encode_faces
+from face_prototypes import build_prototypes, save_prototypes
+from face_gallery import Gallery, gallery_exists, write_gallery, append_gallery, remove_gallery_rows
+from model_server import ModelClient
+from startup import lazy_import
 
-# Check for Raspberry Pi resource limitations
-try:
-    # Check available memory on Raspberry Pi
-    with open('/proc/meminfo', 'r') as f:
-        meminfo = f.read()
-    
-    free_mem = 0
-    for line in meminfo.split('\n'):
-        if 'MemAvailable' in line:
-            free_mem = int(line.split()[1])
-            break
-    
-    # Convert to MB for easier reading
-    free_mem_mb = free_mem / 1024
-    print(f"[INFO] Available memory: {free_mem_mb:.1f} MB")
-    
-    # Warn if memory is low
-    if free_mem_mb < 200:  # Less than 200MB available
-        print("[WARNING] Low memory may affect performance or cause failures")
-except Exception:
-    # Skip if not on Linux or can't read memory info
-    pass
+face_recognition = lazy_import("face_recognition")
 
 # Use absolute paths for better compatibility on Raspberry Pi
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
 # Paths
 dataset_path = os.path.join(current_dir, "dataset")  # Your dataset directory
-encodings_output = os.path.join(current_dir, "encodings.pickle")  # Output file
-
-# Initialize lists
-known_encodings = []
-known_names = []
-
-print("[INFO] Processing dataset...")
-
-# Count total images for progress tracking (helpful on slower Raspberry Pi)
-total_images = 0
-total_people = 0
-for person_name in os.listdir(dataset_path):
-    person_dir = os.path.join(dataset_path, person_name)
-    if os.path.isdir(person_dir):
-        total_people += 1
-        for img_file in os.listdir(person_dir):
+encodings_output = os.path.join(current_dir, "gallery")  # Output gallery (gallery.json + gallery.<n>.f32)
+manifest_path = os.path.join(current_dir, "encodings_manifest.json")  # Images already in the gallery
+
+MANIFEST_VERSION = 1
+
+# Memory budget for the parallel encoder
+CHUNK_MEMORY_MB = 60      # Rough peak per queued chunk (decoded images + dlib buffers)
+WORKER_MEMORY_MB = 150    # Each worker process loads its own dlib/face_recognition models
+MIN_FREE_MEMORY_MB = 150  # Never plan to eat into the last of MemAvailable
+
+# Batches up to this size go through the warm model server when it is running; larger
+# ones finish sooner spread over worker processes, even though each loads the models
+SERVER_MAX_IMAGES = 64
+
+
+def available_memory_mb():
+    """Return MemAvailable from /proc/meminfo in MB, or None if it can't be read"""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            meminfo = f.read()
+        for line in meminfo.split('\n'):
+            if 'MemAvailable' in line:
+                return int(line.split()[1]) / 1024
+    except Exception:
+        # Skip if not on Linux or can't read memory info
+        pass
+    return None
+
+
+def file_hash(path):
+    """SHA-1 of a file's contents, used to spot images that were touched but not changed"""
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def scan_dataset():
+    """Return (person_name, relative_path) for every image in the dataset"""
+    images = []
+    for person_name in sorted(os.listdir(dataset_path)):
+        person_dir = os.path.join(dataset_path, person_name)
+
+        # Skip if not a directory
+        if not os.path.isdir(person_dir):
+            continue
+
+        for img_file in sorted(os.listdir(person_dir)):
             if img_file.endswith(".jpg") or img_file.endswith(".png"):
-                total_images += 1
-
-print(f"[INFO] Found {total_images} images across {total_people} people")
-processed_images = 0
-
-# Start timing for performance monitoring
-start_time = time.time()
-
-# Loop over all person folders in the dataset
-for person_name in os.listdir(dataset_path):
-    person_dir = os.path.join(dataset_path, person_name)
-    
-    # Skip if not a directory
-    if not os.path.isdir(person_dir):
-        continue
-        
-    print(f"[INFO] Processing images for: {person_name}")
-    
-    # Loop over all images for this person
-    person_images = [f for f in os.listdir(person_dir) if f.endswith(".jpg") or f.endswith(".png")]
-    
-    for img_file in person_images:
-        img_path = os.path.join(person_dir, img_file)
-        processed_images += 1
-        
-        # Show progress
-        progress = (processed_images / total_images) * 100
-        print(f"  Processing {img_path} ({processed_images}/{total_images}, {progress:.1f}%)")
-        
+                images.append((person_name, os.path.relpath(os.path.join(person_dir, img_file), current_dir)))
+    return images
+
+
+def load_manifest():
+    """Load the manifest of already-encoded images, or None if there isn't a usable one"""
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return None
+
+
+def save_manifest(images):
+    """Write the manifest atomically"""
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump({"version": MANIFEST_VERSION, "images": images}, f)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+
+def encode_image(img_path, client=None):
+    """Detect and encode every face in one image (on the model server if given), returning a list of encodings"""
+    # Load image and convert to RGB
+    image = cv2.imread(img_path)
+
+    if image is None:
+        # Unlike an image without faces, this one is tried again on the next run
+        raise ValueError("could not load image")
+
+    # Resize image for faster processing on Raspberry Pi
+    # Scale factor can be adjusted based on your Pi's performance
+    scale_factor = 0.5  # Reduce size to 50%
+    if image.shape[0] > 800 or image.shape[1] > 800:
+        width = int(image.shape[1] * scale_factor)
+        height = int(image.shape[0] * scale_factor)
+        image = cv2.resize(image, (width, height))
+        print(f"  [INFO] Resized large image to {width}x{height} for better performance")
+
+    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+    # Detect faces in the image
+    if client is not None:
+        boxes = client.locate(rgb)
+    else:
+        boxes = face_recognition.face_locations(rgb, model="hog")
+
+    if len(boxes) == 0:
+        print(f"  [WARNING] No faces detected in {img_path}")
+        return []
+
+    # Compute facial embeddings for all faces in one batch
+    if client is not None:
+        return client.encode(rgb, boxes)
+    return encode_faces(rgb, boxes)
+
+
+def encode_chunk(chunk, client=None):
+    """Worker entry point: encode a chunk of (person_name, relative_path) images.
+    Encodings are None for images that failed (as opposed to [] for images without a face)."""
+    results = []
+    for person_name, rel_path in chunk:
+        img_path = os.path.join(current_dir, rel_path)
         try:
-            # Load image and convert to RGB
-            image = cv2.imread(img_path)
-            
-            if image is None:
-                print(f"  [WARNING] Could not load {img_path}, skipping")
-                continue
-                
-            # Resize image for faster processing on Raspberry Pi
-            # Scale factor can be adjusted based on your Pi's performance
-            scale_factor = 0.5  # Reduce size to 50%
-            if image.shape[0] > 800 or image.shape[1] > 800:
-                width = int(image.shape[1] * scale_factor)
-                height = int(image.shape[0] * scale_factor)
-                image = cv2.resize(image, (width, height))
-                print(f"  [INFO] Resized large image to {width}x{height} for better performance")
-            
-            rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            
-            # Detect faces in the image
-            boxes = face_recognition.face_locations(rgb, model="hog")
-            
-            if len(boxes) == 0:
-                print(f"  [WARNING] No faces detected in {img_path}")
+            encodings = encode_image(img_path, client)
+            results.append((person_name, rel_path, encodings, os.path.getmtime(img_path)))
+        except Exception as e:
+            print(f"  [ERROR] Error processing {img_path}: {e}")
+            results.append((person_name, rel_path, None, 0.0))
+    return results
+
+
+def max_chunks_in_flight(workers):
+    """How many chunks may be queued at once given the memory currently available"""
+    free_mem_mb = available_memory_mb()
+    if free_mem_mb is None:
+        return workers * 2
+    # Leave headroom for the system, then budget each queued chunk
+    budget = int((free_mem_mb - MIN_FREE_MEMORY_MB) // CHUNK_MEMORY_MB)
+    return max(1, min(workers * 2, budget))
+
+
+def max_workers(workers):
+    """Cap the worker count so every worker's models plus a chunk each fit in MemAvailable"""
+    free_mem_mb = available_memory_mb()
+    if free_mem_mb is None:
+        return workers
+    fit = int((free_mem_mb - MIN_FREE_MEMORY_MB) // (WORKER_MEMORY_MB + CHUNK_MEMORY_MB))
+    if fit < workers:
+        print(f"[INFO] {free_mem_mb:.0f} MB available, limiting the encoder to {max(1, fit)} worker processes")
+    return max(1, min(workers, fit))
+
+
+def encode_images(images, workers=None, chunk_size=8):
+    """Encode a list of (person_name, relative_path) images into gallery rows.
+    Returns (rows, failed) where failed holds the paths of images that could not be encoded."""
+    failed = set()        # Images to leave out of the manifest so the next run retries them
+    known_encodings = []
+    known_names = []
+    known_sources = []   # Source image of each encoding
+    known_captured = []  # Capture time of each source image
+
+    workers = workers or os.cpu_count() or 1
+    chunks = [images[i:i + chunk_size] for i in range(0, len(images), chunk_size)]
+    total_images = len(images)
+    processed_images = 0
+
+    def collect(results):
+        nonlocal processed_images
+        for person_name, rel_path, encodings, captured in results:
+            processed_images += 1
+
+            # Show progress
+            progress = (processed_images / total_images) * 100
+            print(f"  Processed {rel_path} ({processed_images}/{total_images}, {progress:.1f}%)")
+            if encodings is None:
+                failed.add(rel_path)
                 continue
-            
-            # Compute facial embeddings for each face
-            encodings = face_recognition.face_encodings(rgb, boxes)
-            
+
             # Add each encoding to our lists
             for encoding in encodings:
                 known_encodings.append(encoding)
                 known_names.append(person_name)
-                
+                known_sources.append(rel_path)
+                known_captured.append(captured)
+
+    # Small batches (a typical enrolment update) use the already-loaded models of the server
+    client = ModelClient.connect() if 0 < total_images <= SERVER_MAX_IMAGES else None
+    if client is not None:
+        print(f"[INFO] Encoding with the model server at {client.socket_path}")
+        try:
+            for chunk in chunks:
+                collect(encode_chunk(chunk, client))
+        finally:
+            client.close()
+        return (known_encodings, known_names, known_sources, known_captured), failed
+
+    workers = max_workers(workers)
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            collect(encode_chunk(chunk))
             # Occasionally force garbage collection to reduce memory usage
-            if processed_images % 50 == 0:
-                import gc
-                gc.collect()
-                
-        except Exception as e:
-            print(f"  [ERROR] Error processing {img_path}: {e}")
-            continue
-        
-        # Check for memory pressure on Raspberry Pi
-        if processed_images % 25 == 0:
-            try:
-                with open('/proc/meminfo', 'r') as f:
-                    meminfo = f.read()
-                for line in meminfo.split('\n'):
-                    if 'MemAvailable' in line:
-                        free_mem_mb = int(line.split()[1]) / 1024
-                        if free_mem_mb < 100:  # Critical memory level
-                            print(f"[WARNING] Low memory detected: {free_mem_mb:.1f} MB. Consider restarting.")
-                        break
-            except:
-                pass
-
-# Save the facial encodings + names to disk
-print("[INFO] Serializing encodings...")
-data = {"encodings": known_encodings, "names": known_names}
-
-try:
-    with open(encodings_output, "wb") as f:
-        f.write(pickle.dumps(data))
-    print(f"[INFO] Encodings saved to {encodings_output}")
-except Exception as e:
-    print(f"[ERROR] Failed to save encodings: {e}")
-    # Try saving to home directory as fallback on Raspberry Pi
-    fallback_path = os.path.join(os.path.expanduser("~"), "encodings.pickle")
+            gc.collect()
+        return (known_encodings, known_names, known_sources, known_captured), failed
+
+    print(f"[INFO] Encoding with {workers} worker processes")
+    # Never fork: enrolment runs inside the supervisor, whose Tk and fetch threads could
+    # leave a forked child holding a lock nobody will release
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    with multiprocessing.get_context(method).Pool(workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            # Bound the work queued ahead of the workers by the memory available right now;
+            # waiting on the oldest chunk first keeps the merged order deterministic
+            while pending and len(pending) >= max_chunks_in_flight(workers):
+                collect(pending.popleft().get())
+            pending.append(pool.apply_async(encode_chunk, (chunk,)))
+
+            # Check for memory pressure on Raspberry Pi
+            free_mem_mb = available_memory_mb()
+            if free_mem_mb is not None and free_mem_mb < 100:  # Critical memory level
+                print(f"[WARNING] Low memory detected: {free_mem_mb:.1f} MB. Draining queue.")
+                while pending:
+                    collect(pending.popleft().get())
+
+        while pending:
+            collect(pending.popleft().get())
+
+    return (known_encodings, known_names, known_sources, known_captured), failed
+
+
+def image_record(rel_path, previous=None):
+    """Build a manifest entry (mtime, size, hash), reusing the old hash if the file is untouched"""
+    stat = os.stat(os.path.join(current_dir, rel_path))
+    if previous and previous["mtime"] == stat.st_mtime and previous["size"] == stat.st_size:
+        return previous
+    return {
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "sha1": file_hash(os.path.join(current_dir, rel_path)),
+    }
+
+
+def full_encode(images, workers=None):
+    """Re-encode the whole dataset and rewrite the gallery"""
+    print(f"[INFO] Full encode of {len(images)} images")
+    rows, failed = encode_images(images, workers)
+
+    # Save the facial encodings + names to disk
+    print("[INFO] Serializing encodings...")
     try:
-        with open(fallback_path, "wb") as f:
-            f.write(pickle.dumps(data))
-        print(f"[INFO] Encodings saved to fallback location: {fallback_path}")
-    except:
-        print("[ERROR] Could not save encodings to any location")
-
-# Report statistics
-end_time = time.time()
-total_time = end_time - start_time
-print(f"[INFO] Processed {len(known_names)} face images across {len(set(known_names))} people")
-print(f"[INFO] Processing completed in {total_time:.2f} seconds")
+        write_gallery(encodings_output, *rows)
+        print(f"[INFO] Encodings saved to {encodings_output}")
+    except Exception as e:
+        print(f"[ERROR] Failed to save encodings: {e}")
+        # Try saving to home directory as fallback on Raspberry Pi
+        fallback_path = os.path.join(os.path.expanduser("~"), "gallery")
+        try:
+            write_gallery(fallback_path, *rows)
+            print(f"[INFO] Encodings saved to fallback location: {fallback_path}")
+        except:
+            print("[ERROR] Could not save encodings to any location")
+        return
+
+    save_manifest({rel_path: image_record(rel_path) for _, rel_path in images if rel_path not in failed})
+    report_failures(failed)
+
+
+def incremental_encode(images, manifest, workers=None):
+    """Encode only new or changed images and update the gallery in place"""
+    previous = manifest["images"]
+    current = {}
+    changed = []
+
+    for person_name, rel_path in images:
+        old = previous.get(rel_path)
+        record = image_record(rel_path, old)
+        current[rel_path] = record
+        if old is None or old["sha1"] != record["sha1"]:
+            changed.append((person_name, rel_path))
+
+    # Rows to drop: images that were deleted or whose contents changed
+    deleted = set(previous) - set(current)
+    stale = deleted | {rel_path for _, rel_path in changed if rel_path in previous}
+    print(f"[INFO] {len(changed)} new or changed images, {len(deleted)} deleted")
+
+    if stale:
+        gallery = Gallery.load(encodings_output)
+        keep = [source not in stale for source in gallery.sources]
+        del gallery
+        removed = remove_gallery_rows(encodings_output, keep)
+        print(f"[INFO] Removed {removed} stale encodings from the gallery")
+
+    failed = set()
+    if changed:
+        rows, failed = encode_images(changed, workers)
+        print("[INFO] Appending encodings...")
+        append_gallery(encodings_output, *rows)
+        print(f"[INFO] Appended {len(rows[0])} encodings to {encodings_output}")
+
+    save_manifest({rel_path: record for rel_path, record in current.items() if rel_path not in failed})
+    report_failures(failed)
+
+
+def report_failures(failed):
+    if failed:
+        print(f"[WARNING] {len(failed)} images could not be encoded and will be retried next run")
+
+
+def main(full=False, workers=None):
+    # Check for Raspberry Pi resource limitations
+    free_mem_mb = available_memory_mb()
+    if free_mem_mb is not None:
+        print(f"[INFO] Available memory: {free_mem_mb:.1f} MB")
+
+        # Warn if memory is low
+        if free_mem_mb < 200:  # Less than 200MB available
+            print("[WARNING] Low memory may affect performance or cause failures")
+
+    print("[INFO] Processing dataset...")
+
+    # Count total images for progress tracking (helpful on slower Raspberry Pi)
+    images = scan_dataset()
+    print(f"[INFO] Found {len(images)} images across {len(set(name for name, _ in images))} people")
+
+    # Start timing for performance monitoring
+    start_time = time.time()
+
+    # Only encode what changed since the last run, unless asked to start over
+    manifest = None if full else load_manifest()
+    if manifest is not None and gallery_exists(encodings_output):
+        incremental_encode(images, manifest, workers)
+    else:
+        full_encode(images, workers)
+
+    # Build the per-person prototype index next to the encodings
+    print("[INFO] Building prototype index...")
+    try:
+        gallery = Gallery.load(encodings_output)
+        prototypes_output = os.path.join(os.path.dirname(encodings_output), "prototypes.pickle")
+        save_prototypes(build_prototypes(gallery.matrix, gallery.row_names), prototypes_output)
+        print(f"[INFO] Prototype index saved to {prototypes_output}")
+    except Exception as e:
+        print(f"[ERROR] Failed to build prototype index: {e}")
+        return
+
+    # Report statistics
+    end_time = time.time()
+    total_time = end_time - start_time
+    print(f"[INFO] Gallery holds {len(gallery)} face encodings across {len(gallery.names)} people")
+    print(f"[INFO] Processing completed in {total_time:.2f} seconds")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Encode the face dataset into the gallery")
+    parser.add_argument("--full", action="store_true", help="ignore the manifest and re-encode every image")
+    parser.add_argument("--workers", type=int, default=None, help="encoder processes (default: one per CPU core)")
+    args = parser.parse_args()
+    main(full=args.full, workers=args.workers)
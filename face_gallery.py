@@ -0,0 +1,226 @@
+"""
+Compact, versioned on-disk gallery of known face encodings.
+A gallery is stored as two files sharing a base path:
+    <base>.<n>.f32  raw little-endian float32 matrix, one 128-d encoding per row
+    <base>.json     header with the format version, interned name table,
+                    per-row metadata (name index, source image, capture time)
+                    and the name of the matrix file of its generation <n>
+A rewrite puts the matrix in a new generation file and replaces the header
+last, so the header never describes a matrix it wasn't written for.
+The matrix is opened with numpy.memmap so loading is zero-copy and costs a
+quarter of the RAM of the old pickle of float64 arrays.
+"""
+import json
+import os
+import pickle
+import sys
+import time
+import numpy as np
+
+from face_matcher import ENCODING_DIM
+
+GALLERY_FORMAT = "smartmirror-gallery"
+GALLERY_VERSION = 1
+GALLERY_DTYPE = np.dtype("<f4")
+
+
+def gallery_paths(base_path):
+    """Return the (legacy matrix, header) file paths for a gallery base path"""
+    return f"{base_path}.f32", f"{base_path}.json"
+
+
+def matrix_path(base_path, header):
+    """Matrix file a header belongs to (galleries written before generations use <base>.f32)"""
+    name = header.get("matrix")
+    return os.path.join(os.path.dirname(base_path), name) if name else gallery_paths(base_path)[0]
+
+
+def gallery_exists(base_path):
+    """Check whether the header and the matrix it points to are present"""
+    header_path = gallery_paths(base_path)[1]
+    if not os.path.exists(header_path):
+        return False
+    try:
+        header = read_header(base_path)
+    except (ValueError, KeyError):
+        return True  # Let Gallery.load report what is wrong with it
+    return os.path.exists(matrix_path(base_path, header))
+
+
+class Gallery:
+    def __init__(self, matrix, names, labels, sources, captured):
+        self.matrix = matrix        # (N, 128) float32, usually a read-only memmap
+        self.names = names          # Interned name table
+        self.labels = labels        # (N,) index into self.names for each row
+        self.sources = sources      # Source image path for each row
+        self.captured = captured    # Capture time (unix seconds) for each row
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    @property
+    def row_names(self):
+        """Name of the person for every row"""
+        return [self.names[label] for label in self.labels]
+
+    @classmethod
+    def load(cls, base_path):
+        """Open a gallery, memory-mapping the encoding matrix"""
+        header = read_header(base_path)
+        path = matrix_path(base_path, header)
+
+        rows = header["rows"]
+        # Extra bytes are rows of an interrupted append; too few means the files don't belong together
+        if os.path.getsize(path) < rows * ENCODING_DIM * GALLERY_DTYPE.itemsize:
+            raise ValueError(f"{path} holds fewer than the {rows} rows its header describes")
+        if rows == 0:
+            matrix = np.zeros((0, ENCODING_DIM), dtype=GALLERY_DTYPE)
+        else:
+            matrix = np.memmap(path, dtype=GALLERY_DTYPE, mode="r", shape=(rows, ENCODING_DIM))
+
+        return cls(
+            matrix,
+            header["names"],
+            np.asarray(header["labels"], dtype=np.int32),
+            header["sources"],
+            header["captured"],
+        )
+
+
+def read_header(base_path):
+    """Read and validate a gallery header"""
+    header_path = gallery_paths(base_path)[1]
+    with open(header_path, "r") as f:
+        header = json.load(f)
+
+    if header.get("format") != GALLERY_FORMAT:
+        raise ValueError(f"{header_path} is not a gallery header")
+    if header.get("version") != GALLERY_VERSION:
+        raise ValueError(f"Unsupported gallery version {header.get('version')} in {header_path}")
+    if header["dim"] != ENCODING_DIM or np.dtype(header["dtype"]) != GALLERY_DTYPE:
+        raise ValueError(f"Unexpected gallery layout in {header_path}")
+    return header
+
+
+def _empty_header():
+    return {
+        "format": GALLERY_FORMAT,
+        "version": GALLERY_VERSION,
+        "dim": ENCODING_DIM,
+        "dtype": GALLERY_DTYPE.str,
+        "rows": 0,
+        "names": [],
+        "labels": [],
+        "sources": [],
+        "captured": [],
+    }
+
+
+def _add_rows(header, names, sources, captured):
+    """Extend a header with per-row metadata, interning new names"""
+    name_index = {name: i for i, name in enumerate(header["names"])}
+    for name in names:
+        # Intern the names so each row only stores a small index
+        if name not in name_index:
+            name_index[name] = len(header["names"])
+            header["names"].append(name)
+        header["labels"].append(name_index[name])
+
+    header["sources"].extend(list(sources) if sources is not None else [""] * len(names))
+    header["captured"].extend([float(t) for t in captured] if captured is not None else [0.0] * len(names))
+    header["rows"] += len(names)
+
+
+def _write_header(base_path, header):
+    header_path = gallery_paths(base_path)[1]
+    header["written"] = time.time()
+    with open(header_path + ".tmp", "w") as f:
+        json.dump(header, f)
+    os.replace(header_path + ".tmp", header_path)
+
+
+def _as_matrix(encodings, names):
+    matrix = np.asarray(encodings, dtype=GALLERY_DTYPE).reshape(-1, ENCODING_DIM)
+    if len(names) != matrix.shape[0]:
+        raise ValueError(f"Gallery has {matrix.shape[0]} encodings but {len(names)} names")
+    return matrix
+
+
+def write_gallery(base_path, encodings, names, sources=None, captured=None):
+    """Write a gallery atomically from per-row encodings, names and optional metadata"""
+    matrix = _as_matrix(encodings, names)
+    header = _empty_header()
+    _add_rows(header, names, sources, captured)
+
+    # The matrix goes to a new generation file and the header is replaced last, so a crash
+    # leaves either the old gallery or the new one (plus an orphan the next write reuses)
+    try:
+        old_header = read_header(base_path)
+    except (OSError, ValueError, KeyError):
+        old_header = None
+    header["generation"] = old_header.get("generation", 0) + 1 if old_header else 1
+    header["matrix"] = f"{os.path.basename(base_path)}.{header['generation']}.f32"
+    path = matrix_path(base_path, header)
+    matrix.tofile(path + ".tmp")
+    os.replace(path + ".tmp", path)
+    _write_header(base_path, header)
+
+    # Readers that still map the old matrix keep it until they close it
+    if old_header is not None and matrix_path(base_path, old_header) != path:
+        try:
+            os.remove(matrix_path(base_path, old_header))
+        except OSError:
+            pass
+
+
+def append_gallery(base_path, encodings, names, sources=None, captured=None):
+    """Append rows to an existing gallery in place"""
+    matrix = _as_matrix(encodings, names)
+    header = read_header(base_path)
+
+    with open(matrix_path(base_path, header), "r+b") as f:
+        # Drop any rows left behind by an interrupted append before adding new ones
+        f.truncate(header["rows"] * ENCODING_DIM * GALLERY_DTYPE.itemsize)
+        f.seek(0, os.SEEK_END)
+        f.write(matrix.tobytes())
+
+    # The header is written last, so readers only ever see complete rows
+    _add_rows(header, names, sources, captured)
+    _write_header(base_path, header)
+
+
+def remove_gallery_rows(base_path, keep):
+    """Rewrite a gallery keeping only the rows where keep is True"""
+    gallery = Gallery.load(base_path)
+    keep = np.asarray(keep, dtype=bool)
+    rows = np.flatnonzero(keep)
+
+    # Copy the kept rows out before the memmapped file is replaced
+    matrix = np.array(gallery.matrix[rows])
+    names = [gallery.names[gallery.labels[i]] for i in rows]
+    sources = [gallery.sources[i] for i in rows]
+    captured = [gallery.captured[i] for i in rows]
+    del gallery
+
+    write_gallery(base_path, matrix, names, sources, captured)
+    return len(keep) - len(rows)
+
+
+def migrate_pickle(pickle_path, base_path):
+    """One-shot conversion of an old encodings.pickle into the gallery format"""
+    with open(pickle_path, "rb") as f:
+        data = pickle.load(f)
+
+    # Old pickles carry no metadata; record the pickle itself as the source
+    captured = [os.path.getmtime(pickle_path)] * len(data["names"])
+    sources = [os.path.basename(pickle_path)] * len(data["names"])
+    write_gallery(base_path, data["encodings"], data["names"], sources, captured)
+    return len(data["names"])
+
+
+if __name__ == "__main__":
+    # Usage: python face_gallery.py [encodings.pickle] [gallery]
+    pickle_path = sys.argv[1] if len(sys.argv) > 1 else "encodings.pickle"
+    base_path = sys.argv[2] if len(sys.argv) > 2 else "gallery"
+    count = migrate_pickle(pickle_path, base_path)
+    print(f"[INFO] Migrated {count} encodings from {pickle_path} to {base_path}")
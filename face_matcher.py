@@ -0,0 +1,60 @@
+"""
+Vectorized nearest-neighbour matching of face encodings against the known gallery.
+The gallery is packed once into a contiguous float32 matrix (with precomputed
+squared norms) so every face in a frame is matched with one matrix operation
+instead of rebuilding the gallery array for each face.
+"""
+import numpy as np
+
+# Dimension of the dlib face embeddings produced by face_recognition
+ENCODING_DIM = 128
+
+
+class FaceMatcher:
+    def __init__(self, encodings, names):
+        """Pack the gallery encodings into a float32 (N, 128) matrix"""
+        self.names = list(names)
+        self.matrix = np.ascontiguousarray(
+            np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        )
+        # Squared L2 norm of every gallery row, reused for every query
+        self.norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+        if len(self.names) != self.matrix.shape[0]:
+            raise ValueError(
+                f"Gallery has {self.matrix.shape[0]} encodings but {len(self.names)} names"
+            )
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def distances(self, encodings):
+        """Return the (M, N) euclidean distance matrix between M query encodings and the gallery"""
+        queries = np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        query_norms = np.einsum("ij,ij->i", queries, queries)
+
+        # ||q - g||^2 = ||q||^2 + ||g||^2 - 2 q.g, computed for all pairs at once
+        squared = queries @ self.matrix.T
+        squared *= -2.0
+        squared += query_norms[:, None]
+        squared += self.norms[None, :]
+
+        # Rounding can push tiny distances slightly below zero
+        np.maximum(squared, 0.0, out=squared)
+        return np.sqrt(squared, out=squared)
+
+    def match(self, encodings):
+        """Return a (name, distance) tuple with the best gallery match for each query encoding"""
+        if len(encodings) == 0:
+            return []
+        if len(self) == 0:
+            return [("Unknown", float("inf")) for _ in encodings]
+
+        distances = self.distances(encodings)
+        best_indices = np.argmin(distances, axis=1)
+        best_distances = distances[np.arange(len(best_indices)), best_indices]
+
+        return [
+            (self.names[index], float(distance))
+            for index, distance in zip(best_indices, best_distances)
+        ]
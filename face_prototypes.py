@@ -0,0 +1,166 @@
+"""
+Per-person prototype index used to shrink the gallery searched every frame.
+Each enrolled person is summarised by a handful of k-means centroids plus the
+spread of their own encodings around them, and every centroid keeps the radius
+(farthest member) of the encodings assigned to it, which bounds how close any
+gallery encoding can be to a query. Faces are matched against this
+small index first and only fall back to the full gallery when the result is
+ambiguous, so per-frame matching cost stays flat as more people enrol.
+"""
+import pickle
+import numpy as np
+
+from face_matcher import FaceMatcher, ENCODING_DIM
+
+# Bump when the layout of the pickled index changes
+PROTOTYPE_VERSION = 2
+
+
+def kmeans(points, k, iterations=15, seed=0):
+    """Cluster points into at most k centroids (k-means++ seeding, deterministic)"""
+    points = np.asarray(points, dtype=np.float32)
+    k = min(k, len(points))
+    rng = np.random.default_rng(seed)
+
+    # k-means++ seeding: spread the initial centroids out
+    centroids = [points[rng.integers(len(points))]]
+    for _ in range(1, k):
+        d2 = np.min([np.sum((points - c) ** 2, axis=1) for c in centroids], axis=0)
+        total = d2.sum()
+        if total <= 0:
+            break
+        centroids.append(points[rng.choice(len(points), p=d2 / total)])
+    centroids = np.array(centroids, dtype=np.float32)
+
+    for _ in range(iterations):
+        distances = FaceMatcher(centroids, range(len(centroids))).distances(points)
+        labels = np.argmin(distances, axis=1)
+        updated = np.array([
+            points[labels == i].mean(axis=0) if np.any(labels == i) else centroids[i]
+            for i in range(len(centroids))
+        ], dtype=np.float32)
+        if np.allclose(updated, centroids, atol=1e-5):
+            break
+        centroids = updated
+
+    return centroids
+
+
+def build_prototypes(encodings, names, per_person=8, spread_percentile=95):
+    """Build the prototype index dict from the full gallery"""
+    encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)
+    names = np.asarray(names)
+
+    all_centroids = []
+    centroid_names = []
+    radius = []     # Farthest member of each centroid
+    spread = {}
+
+    for name in sorted(set(names.tolist())):
+        person_encodings = encodings[names == name]
+        centroids = kmeans(person_encodings, per_person)
+
+        # How far this person's own encodings sit from their nearest prototype
+        member_distances = FaceMatcher(centroids, [name] * len(centroids)).distances(person_encodings)
+        nearest = member_distances.min(axis=1)
+        spread[name] = float(np.percentile(nearest, spread_percentile))
+        assigned = member_distances.argmin(axis=1)
+        radius.extend(float(nearest[assigned == i].max()) if np.any(assigned == i) else 0.0
+                      for i in range(len(centroids)))
+
+        all_centroids.append(centroids)
+        centroid_names.extend([name] * len(centroids))
+
+    return {
+        "version": PROTOTYPE_VERSION,
+        "centroids": np.concatenate(all_centroids) if all_centroids else np.zeros((0, ENCODING_DIM), np.float32),
+        "names": centroid_names,
+        "radius": radius,
+        "spread": spread,
+        "gallery_size": len(encodings),
+    }
+
+
+def save_prototypes(index, path):
+    """Write a prototype index dict to disk"""
+    with open(path, "wb") as f:
+        pickle.dump(index, f)
+
+
+def load_prototypes(path):
+    """Read a prototype index dict from disk, returning None if it is missing or outdated"""
+    try:
+        with open(path, "rb") as f:
+            index = pickle.load(f)
+    except (FileNotFoundError, pickle.UnpicklingError, EOFError):
+        return None
+    if not isinstance(index, dict) or index.get("version") != PROTOTYPE_VERSION:
+        return None
+    return index
+
+
+class PrototypeIndex:
+    def __init__(self, index, gallery_matcher, threshold, margin=0.05):
+        """Match against per-person prototypes, falling back to the full gallery matcher"""
+        self.prototypes = FaceMatcher(index["centroids"], index["names"])
+        self.spread = index["spread"]
+        self.radius = np.asarray(index["radius"], dtype=np.float32)
+        self.gallery = gallery_matcher
+        gallery_names = np.asarray(gallery_matcher.names)
+        self.person_rows = {name: np.flatnonzero(gallery_names == name) for name in self.spread}
+        self.threshold = threshold
+        self.margin = margin
+        self.fallbacks = 0
+        self.lookups = 0
+
+    def __len__(self):
+        return len(self.gallery)
+
+    def nearest_member(self, encoding, name):
+        """Distance from a query to the closest gallery encoding of one person"""
+        members = self.gallery.matrix[self.person_rows[name]]
+        return float(np.min(np.linalg.norm(members - np.asarray(encoding, dtype=np.float32), axis=1)))
+
+    def match(self, encodings):
+        """Return a (name, distance) tuple per query, like FaceMatcher.match"""
+        if len(encodings) == 0:
+            return []
+        if len(self.prototypes) == 0:
+            return self.gallery.match(encodings)
+
+        distances = self.prototypes.distances(encodings)
+        names = np.asarray(self.prototypes.names)
+        results = []
+        ambiguous = []
+
+        for row, query_distances in enumerate(distances):
+            order = np.argsort(query_distances)
+            best_name = names[order[0]]
+            best_distance = float(query_distances[order[0]])
+
+            # Closest prototype that belongs to somebody else
+            others = order[names[order] != best_name]
+            runner_up = float(query_distances[others[0]]) if len(others) else float("inf")
+
+            spread = self.spread.get(best_name, 0.0)
+            if best_distance <= spread and runner_up - best_distance >= self.margin:
+                # Well inside one person's cluster and clearly separated from the rest;
+                # report the distance to their nearest encoding, as a gallery search would
+                results.append((str(best_name), self.nearest_member(encodings[row], best_name)))
+            elif np.min(query_distances - self.radius) > self.threshold:
+                # Beyond the threshold from every cluster's farthest member (triangle inequality):
+                # nobody in the gallery can match
+                results.append((str(best_name), best_distance))
+            else:
+                results.append(None)
+                ambiguous.append(row)
+
+        self.lookups += len(results)
+        if ambiguous:
+            # Only ambiguous faces pay for a search of the full gallery
+            self.fallbacks += len(ambiguous)
+            queries = np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_DIM)[ambiguous]
+            for row, match in zip(ambiguous, self.gallery.match(queries)):
+                results[row] = match
+
+        return results
@@ -0,0 +1,145 @@
+"""
+Lightweight face tracking used between full detection passes.
+Detections are associated to existing tracks by IoU; in between detections
+the boxes are moved forward with sparse Lucas-Kanade optical flow. Each track
+keeps the identity it was recognised with, so encoding and matching only run
+when a new track appears or a track's confidence drops.
+"""
+import cv2
+import numpy as np
+
+# Size of the thumbnail used to detect scene changes between detections
+SCENE_THUMBNAIL_SIZE = (80, 60)
+
+
+def box_iou(a, b):
+    """Intersection over union of two (left, top, right, bottom) boxes"""
+    left, top = max(a[0], b[0]), max(a[1], b[1])
+    right, bottom = min(a[2], b[2]), min(a[3], b[3])
+    intersection = max(0, right - left) * max(0, bottom - top)
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    union = area_a + area_b - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def scene_thumbnail(gray):
+    """Small blurred copy of a grayscale frame for cheap scene-change checks"""
+    return cv2.GaussianBlur(cv2.resize(gray, SCENE_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA), (5, 5), 0)
+
+
+def scene_difference(thumbnail_a, thumbnail_b):
+    """Mean absolute pixel difference between two scene thumbnails (0-255)"""
+    return float(np.mean(cv2.absdiff(thumbnail_a, thumbnail_b)))
+
+
+class Track:
+    def __init__(self, track_id, box, detection_confidence):
+        self.id = track_id
+        self.box = box                          # (left, top, right, bottom) in frame pixels
+        self.detection_confidence = detection_confidence
+        self.name = None                        # None until the track has been recognised
+        self.confidence = 0.0                   # Recognition confidence (1 - distance)
+        self.quality = 1.0                      # How much we still trust the tracked box
+        self.misses = 0                         # Consecutive detections this track was not matched
+        self.frames_since_recognition = 0
+
+    def needs_recognition(self, min_quality, recognition_interval):
+        """Whether this track should go through encoding and matching again"""
+        return (
+            self.name is None
+            or self.quality < min_quality
+            or self.frames_since_recognition >= recognition_interval
+        )
+
+    def set_identity(self, name, confidence):
+        self.name = name
+        self.confidence = confidence
+        self.quality = 1.0
+        self.frames_since_recognition = 0
+
+
+class FaceTracker:
+    def __init__(self, iou_threshold=0.3, max_misses=3):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.tracks = []
+        self.next_id = 1
+
+    def update(self, detections):
+        """Associate fresh (left, top, right, bottom, conf) detections with the current tracks"""
+        for track in self.tracks:
+            track.frames_since_recognition += 1
+
+        # Greedy association, best overlapping pairs first
+        pairs = sorted(
+            ((box_iou(track.box, det[:4]), t, d)
+             for t, track in enumerate(self.tracks)
+             for d, det in enumerate(detections)),
+            reverse=True,
+        )
+        matched_tracks = set()
+        matched_detections = set()
+        for iou, t, d in pairs:
+            if iou < self.iou_threshold:
+                break
+            if t in matched_tracks or d in matched_detections:
+                continue
+            track = self.tracks[t]
+            track.box = tuple(detections[d][:4])
+            track.detection_confidence = detections[d][4]
+            track.quality = 1.0
+            track.misses = 0
+            matched_tracks.add(t)
+            matched_detections.add(d)
+
+        # Tracks the detector no longer sees fade out after a few misses
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.misses += 1
+                track.quality *= 0.5
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_misses]
+
+        # Unmatched detections start new tracks
+        for d, det in enumerate(detections):
+            if d not in matched_detections:
+                self.tracks.append(Track(self.next_id, tuple(det[:4]), det[4]))
+                self.next_id += 1
+
+        return self.tracks
+
+    def predict(self, previous_gray, gray):
+        """Move every track forward with sparse optical flow between two grayscale frames"""
+        height, width = gray.shape[:2]
+        for track in self.tracks:
+            track.frames_since_recognition += 1
+            left, top, right, bottom = track.box
+
+            # Pick corners inside the face box to follow
+            mask = np.zeros_like(previous_gray)
+            mask[max(0, top):max(0, bottom), max(0, left):max(0, right)] = 255
+            points = cv2.goodFeaturesToTrack(previous_gray, maxCorners=20, qualityLevel=0.01,
+                                             minDistance=5, mask=mask)
+            if points is None:
+                track.quality *= 0.5
+                continue
+
+            moved, status, _ = cv2.calcOpticalFlowPyrLK(previous_gray, gray, points, None,
+                                                        winSize=(15, 15), maxLevel=2)
+            good = status.reshape(-1) == 1
+            if not np.any(good):
+                track.quality *= 0.5
+                continue
+
+            # Shift the box by the median motion of the points that were followed
+            dx, dy = np.median((moved - points).reshape(-1, 2)[good], axis=0)
+            dx, dy = int(round(dx)), int(round(dy))
+            track.box = (
+                min(max(0, left + dx), width - 1),
+                min(max(0, top + dy), height - 1),
+                min(max(1, right + dx), width),
+                min(max(1, bottom + dy), height),
+            )
+            track.quality *= float(np.mean(good))
+
+        return self.tracks
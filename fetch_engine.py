@@ -0,0 +1,117 @@
+"""
+Single asyncio engine for the dashboard's network fetches.
+One event loop runs on one background thread. Every fetch goes through it,
+so requests share a pooled keep-alive HTTP session, each source (newsapi,
+quotes, ...) gets its own concurrency limit, every call has a deadline, and
+failed calls are retried with exponential backoff.
+
+Blocking client libraries (requests, yfinance) run in the loop's worker
+threads through asyncio.to_thread; the scheduling, limits, deadlines and
+retries all live in the loop.
+
+    engine = get_engine()
+    future = engine.submit("newsapi", fetch_headlines, "sports", deadline=10)
+    engine.deliver(future, root, show_headlines)   # callback runs on the Tk thread
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from startup import lazy_import
+
+requests = lazy_import("requests")
+
+# Concurrent calls allowed per source; anything unlisted gets DEFAULT_LIMIT
+SOURCE_LIMITS = {"newsapi": 4, "quotes": 1}
+DEFAULT_LIMIT = 2
+WORKER_THREADS = 8
+POOL_SIZE = 8           # Keep-alive connections kept per host
+
+
+class FetchEngine:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(ThreadPoolExecutor(WORKER_THREADS, thread_name_prefix="fetch"))
+        self.semaphores = {}
+        self._session = None
+        self.session_lock = threading.Lock()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="fetch-engine", daemon=True)
+        self.thread.start()
+
+    @property
+    def session(self):
+        """Pooled keep-alive HTTP session shared by every fetch"""
+        with self.session_lock:
+            if self._session is None:
+                self._session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                self._session.mount("https://", adapter)
+                self._session.mount("http://", adapter)
+            return self._session
+
+    def semaphore(self, source):
+        # Only touched from the loop thread, so no lock is needed
+        if source not in self.semaphores:
+            self.semaphores[source] = asyncio.Semaphore(SOURCE_LIMITS.get(source, DEFAULT_LIMIT))
+        return self.semaphores[source]
+
+    async def call(self, source, func, *args, deadline=10.0, retries=2, backoff=0.5):
+        """Run a blocking fetch under the source's limit, retrying with backoff until the deadline"""
+        end = self.loop.time() + deadline
+        for attempt in range(retries + 1):
+            try:
+                async with self.semaphore(source):
+                    remaining = end - self.loop.time()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    return await asyncio.wait_for(asyncio.to_thread(func, *args), remaining)
+            except Exception:
+                delay = backoff * 2 ** attempt
+                if attempt == retries or self.loop.time() + delay >= end:
+                    raise
+                await asyncio.sleep(delay)
+
+    async def gather(self, source, func, keys, deadline=10.0, retries=2):
+        """Call func(key) for every key concurrently; returns {key: result or None if it failed}"""
+        results = await asyncio.gather(*(self.call(source, func, key, deadline=deadline, retries=retries)
+                                         for key in keys), return_exceptions=True)
+        output = {}
+        for key, result in zip(keys, results):
+            if isinstance(result, BaseException):
+                print(f"[WARNING] {source} fetch for {key} failed: {result!r}")
+                result = None
+            output[key] = result
+        return output
+
+    def run(self, coroutine):
+        """Schedule a coroutine on the engine loop; returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def submit(self, source, func, *args, deadline=10.0, retries=2):
+        """Schedule one blocking fetch; returns a concurrent.futures.Future"""
+        return self.run(self.call(source, func, *args, deadline=deadline, retries=retries))
+
+    @staticmethod
+    def deliver(future, root, callback, fallback=None):
+        """Hand a future's result (or fallback if it failed) to callback on the Tk thread"""
+        def done(f):
+            try:
+                result = f.result()
+            except Exception as e:
+                print(f"[WARNING] Fetch failed: {e!r}")
+                result = fallback
+            root.after(0, callback, result)
+        future.add_done_callback(done)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """The process-wide engine, started on first use"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = FetchEngine()
+        return _engine
@@ -0,0 +1,131 @@
+"""
+Staged capture / inference / render pipeline for the recognition loop.
+Each stage runs on its own thread and hands work to the next through a small
+bounded queue that drops the oldest item when full, so inference always works
+on the freshest frame and a slow stage never backs up the others. Every stage
+records its own latency.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class LatestQueue:
+    def __init__(self, maxsize=1):
+        """Bounded queue that discards the oldest item instead of blocking the producer"""
+        self.items = deque()
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.condition = threading.Condition()
+
+    def put(self, item):
+        with self.condition:
+            if len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """Return the next item, or None if nothing arrived within the timeout"""
+        with self.condition:
+            if not self.items:
+                self.condition.wait(timeout)
+            return self.items.popleft() if self.items else None
+
+
+class StageStats:
+    def __init__(self, name, window=300):
+        """Rolling latency statistics for one pipeline stage (window=None keeps every sample)"""
+        self.name = name
+        self.latencies = deque(maxlen=window)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.latencies.append(seconds)
+            self.count += 1
+
+    def summary(self):
+        """Return count and mean/p50/p95/p99/max latency in milliseconds over the recent window"""
+        with self.lock:
+            latencies = sorted(self.latencies)
+            count = self.count
+        if not latencies:
+            return {"stage": self.name, "count": count}
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+        return {
+            "stage": self.name,
+            "count": count,
+            "mean_ms": sum(latencies) / len(latencies) * 1000,
+            "p50_ms": percentile(50),
+            "p95_ms": percentile(95),
+            "p99_ms": percentile(99),
+            "max_ms": latencies[-1] * 1000,
+        }
+
+    def __str__(self):
+        s = self.summary()
+        if "mean_ms" not in s:
+            return f"{self.name}: no samples"
+        return f"{self.name}: {s['mean_ms']:.1f} ms avg, {s['p95_ms']:.1f} ms p95 ({s['count']} items)"
+
+
+class StageTimer:
+    def __init__(self, window=300):
+        """Named StageStats created on first use, for timing steps inside a stage"""
+        self.window = window
+        self.stats = {}
+
+    @contextmanager
+    def measure(self, name):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = StageStats(name, self.window)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats.record(time.perf_counter() - start)
+
+    def summary(self):
+        return {name: stats.summary() for name, stats in self.stats.items()}
+
+
+class PipelineStage(threading.Thread):
+    def __init__(self, name, work, stop_event, input_queue=None, output_queue=None):
+        """Run work(item) for each item from input_queue (or forever if None), forwarding results"""
+        super().__init__(name=name, daemon=True)
+        self.work = work
+        self.stop_event = stop_event
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.stats = StageStats(name)
+        self.error = None
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                if self.input_queue is not None:
+                    item = self.input_queue.get(timeout=0.1)
+                    if item is None:
+                        continue
+                    args = (item,)
+                else:
+                    args = ()
+
+                start = time.perf_counter()
+                result = self.work(*args)
+                self.stats.record(time.perf_counter() - start)
+
+                if self.output_queue is not None and result is not None:
+                    self.output_queue.put(result)
+        except BaseException as e:
+            # Includes SystemExit from exit() inside a stage; the owner re-raises it
+            self.error = e
+            self.stop_event.set()
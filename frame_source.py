@@ -0,0 +1,192 @@
+"""
+Pluggable frame sources for the recognizer and the dataset capture script.
+Every source returns frames in the same 4-channel layout as the Picamera2
+XRGB8888 preview stream, so recorded or synthetic frames go through exactly
+the same FaceRecognitionSystem.process_frame path as live camera frames.
+
+Sources are created from a short spec string:
+    picamera            the Raspberry Pi camera (default)
+    dir:<path>          a directory of JPEG/PNG frames, in file name order
+    video:<path>        a video file readable by OpenCV
+    synthetic[:<n>]     n generated frames (endless if n is omitted)
+"""
+import os
+import time
+import cv2
+import numpy as np
+
+
+class EndOfStream(Exception):
+    """Raised by consumers when a finite frame source has no more frames"""
+
+
+class FrameSource:
+    def __init__(self, resolution=(640, 480), realtime=True, fps=30.0):
+        self.resolution = resolution
+        self.realtime = realtime   # Pace frames at fps, or return them as fast as possible
+        self.fps = fps
+        self.next_frame_time = None
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def read(self):
+        """Return the next frame, or None when the source is exhausted"""
+        frame = self.read_frame()
+        if frame is not None and self.realtime and self.fps:
+            self.pace()
+        return frame
+
+    def read_frame(self):
+        raise NotImplementedError
+
+    def pace(self):
+        """Sleep just long enough to deliver frames at the source's frame rate"""
+        now = time.perf_counter()
+        if self.next_frame_time is None or now - self.next_frame_time > 1.0:
+            self.next_frame_time = now
+        delay = self.next_frame_time - now
+        if delay > 0:
+            time.sleep(delay)
+        self.next_frame_time += 1.0 / self.fps
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def to_camera_layout(image, resolution):
+    """Convert an OpenCV BGR image into the camera's 4-channel layout at the given resolution"""
+    if (image.shape[1], image.shape[0]) != tuple(resolution):
+        image = cv2.resize(image, tuple(resolution))
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGRA)
+    if image.shape[2] == 4:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+
+
+class PicameraSource(FrameSource):
+    def __init__(self, resolution=(640, 480), warmup=2.0):
+        # The camera paces itself, so never add extra sleeps
+        super().__init__(resolution, realtime=False)
+        self.warmup = warmup
+        self.picam2 = None
+
+    def start(self):
+        from picamera2 import Picamera2
+        self.picam2 = Picamera2()
+        self.picam2.configure(self.picam2.create_preview_configuration(
+            main={"format": 'XRGB8888', "size": self.resolution}
+        ))
+        self.picam2.start()
+        # Give camera time to stabilize
+        time.sleep(self.warmup)
+
+    def stop(self):
+        if self.picam2 is not None:
+            self.picam2.stop()
+
+    def read_frame(self):
+        return self.picam2.capture_array()
+
+
+class ImageDirectorySource(FrameSource):
+    def __init__(self, path, resolution=(640, 480), realtime=True, fps=30.0, loop=False):
+        super().__init__(resolution, realtime, fps)
+        self.loop = loop
+        self.files = sorted(
+            os.path.join(path, f) for f in os.listdir(path)
+            if f.lower().endswith((".jpg", ".jpeg", ".png"))
+        )
+        self.index = 0
+        self.current_file = None   # File the last returned frame was read from
+        self.skipped = 0           # Unreadable files passed over
+
+    def read_frame(self):
+        while self.index < len(self.files) or (self.loop and self.files):
+            if self.index >= len(self.files):
+                self.index = 0
+            path = self.files[self.index]
+            image = cv2.imread(path)
+            self.index += 1
+            if image is not None:
+                self.current_file = path
+                return to_camera_layout(image, self.resolution)
+            print(f"[WARNING] Skipping unreadable frame {path}")
+            self.skipped += 1
+        return None
+
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path, resolution=(640, 480), realtime=True, loop=False):
+        super().__init__(resolution, realtime)
+        self.path = path
+        self.loop = loop
+        self.capture = None
+
+    def start(self):
+        self.capture = cv2.VideoCapture(self.path)
+        if not self.capture.isOpened():
+            raise IOError(f"Could not open video {self.path}")
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+
+    def stop(self):
+        if self.capture is not None:
+            self.capture.release()
+
+    def read_frame(self):
+        ok, image = self.capture.read()
+        if not ok and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, image = self.capture.read()
+        return to_camera_layout(image, self.resolution) if ok else None
+
+
+class SyntheticSource(FrameSource):
+    def __init__(self, resolution=(640, 480), realtime=True, fps=30.0, frames=None, seed=0):
+        """Noisy background with a face-sized blob drifting across it"""
+        super().__init__(resolution, realtime, fps)
+        self.frames = frames
+        self.count = 0
+        rng = np.random.default_rng(seed)
+        width, height = resolution
+        self.background = rng.integers(60, 120, size=(height, width, 3), dtype=np.uint8)
+
+    def read_frame(self):
+        if self.frames is not None and self.count >= self.frames:
+            return None
+        width, height = self.resolution
+        image = self.background.copy()
+
+        # Move a skin-toned ellipse with eyes around the frame
+        t = self.count / max(self.fps, 1.0)
+        cx = int(width / 2 + width / 4 * np.sin(t))
+        cy = int(height / 2 + height / 8 * np.cos(t * 0.7))
+        axes = (width // 12, height // 6)
+        cv2.ellipse(image, (cx, cy), axes, 0, 0, 360, (140, 170, 210), -1)
+        for dx in (-axes[0] // 2, axes[0] // 2):
+            cv2.circle(image, (cx + dx, cy - axes[1] // 4), max(2, axes[0] // 8), (40, 40, 40), -1)
+
+        self.count += 1
+        return to_camera_layout(image, self.resolution)
+
+
+def create_frame_source(spec="picamera", resolution=(640, 480), realtime=True, loop=False):
+    """Build a frame source from a spec string (see the module docstring)"""
+    kind, _, argument = spec.partition(":")
+    if kind == "picamera":
+        return PicameraSource(resolution)
+    if kind == "dir":
+        return ImageDirectorySource(argument, resolution, realtime, loop=loop)
+    if kind == "video":
+        return VideoFileSource(argument, resolution, realtime, loop=loop)
+    if kind == "synthetic":
+        return SyntheticSource(resolution, realtime, frames=int(argument) if argument else None)
+    raise ValueError(f"Unknown frame source '{spec}'")
@@ -0,0 +1,165 @@
+"""
+Adaptive frame-rate governor for the recognition loop.
+Every few seconds it reads CPU load (/proc/stat), SoC temperature
+(/sys/class/thermal) and the measured inference latency, and moves one step up
+or down a ladder of operating levels. Higher levels lower the target FPS,
+detect less often and detect at a lower resolution, so the Pi settles at a
+steady latency instead of being throttled by the firmware. The current level
+and the reason for the last change are exposed through state().
+"""
+import os
+import time
+
+THERMAL_ZONE = "/sys/class/thermal/thermal_zone0/temp"
+
+
+def read_temperature():
+    """SoC temperature in degrees C, or None where it isn't available"""
+    try:
+        with open(THERMAL_ZONE, "r") as f:
+            return int(f.read().strip()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+
+class CpuLoad:
+    def __init__(self):
+        """Whole-system CPU utilisation between successive reads of /proc/stat"""
+        self.previous = self.read_times()
+
+    @staticmethod
+    def read_times():
+        try:
+            with open("/proc/stat", "r") as f:
+                fields = [int(value) for value in f.readline().split()[1:]]
+            idle = fields[3] + (fields[4] if len(fields) > 4 else 0)  # idle + iowait
+            return idle, sum(fields)
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def read(self):
+        """Fraction of CPU time busy since the last call (0-1), or None if unknown"""
+        current = self.read_times()
+        previous, self.previous = self.previous, current
+        if current is None or previous is None or current[1] == previous[1]:
+            # Fall back to the load average where /proc/stat isn't readable
+            try:
+                return min(1.0, os.getloadavg()[0] / (os.cpu_count() or 1))
+            except OSError:
+                return None
+        idle = current[0] - previous[0]
+        total = current[1] - previous[1]
+        return 1.0 - idle / total
+
+
+class FrameRateGovernor:
+    def __init__(self, min_fps=5.0, max_fps=30.0, base_detection_interval=5, resolutions=(None, 320, 256),
+                 levels=4, target_temp=70.0, max_temp=80.0, max_load=0.85, period=2.0):
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.base_detection_interval = base_detection_interval
+        self.resolutions = list(resolutions)
+        self.levels = levels
+        self.target_temp = target_temp      # Start backing off above this temperature
+        self.max_temp = max_temp            # Jump straight to the most economical level above this
+        self.max_load = max_load
+        self.period = period
+
+        self.cpu = CpuLoad()
+        self.level = 0
+        self.reason = "starting up"
+        self.temperature = None
+        self.cpu_load = None
+        self.latency_total = 0.0
+        self.latency_count = 0
+        self.latency_ms = None
+        self.last_update = time.time()
+        self.next_frame_time = None
+
+    @property
+    def target_fps(self):
+        return self.max_fps - (self.max_fps - self.min_fps) * self.level / self.levels
+
+    @property
+    def detection_interval(self):
+        return self.base_detection_interval * (1 + self.level)
+
+    @property
+    def detection_resolution(self):
+        return self.resolutions[min(self.level, len(self.resolutions) - 1)]
+
+    def observe(self, latency):
+        """Record the inference latency (seconds) of one frame"""
+        self.latency_total += latency
+        self.latency_count += 1
+
+    def update(self):
+        """Re-evaluate the operating level once per period; returns True if it changed"""
+        now = time.time()
+        if now - self.last_update < self.period:
+            return False
+        self.last_update = now
+
+        self.temperature = read_temperature()
+        self.cpu_load = self.cpu.read()
+        if self.latency_count:
+            self.latency_ms = self.latency_total / self.latency_count * 1000
+        self.latency_total, self.latency_count = 0.0, 0
+        budget_ms = 1000.0 / self.target_fps
+
+        level = self.level
+        if self.temperature is not None and self.temperature >= self.max_temp:
+            level, reason = self.levels, f"temperature {self.temperature:.1f}C at or above {self.max_temp:.0f}C"
+        elif self.temperature is not None and self.temperature > self.target_temp:
+            level, reason = level + 1, f"temperature {self.temperature:.1f}C above {self.target_temp:.0f}C"
+        elif self.cpu_load is not None and self.cpu_load > self.max_load:
+            level, reason = level + 1, f"CPU load {self.cpu_load * 100:.0f}% above {self.max_load * 100:.0f}%"
+        elif self.latency_ms is not None and self.latency_ms > budget_ms:
+            level, reason = level + 1, f"latency {self.latency_ms:.0f} ms over the {budget_ms:.0f} ms frame budget"
+        elif self.has_headroom(budget_ms):
+            level, reason = level - 1, "temperature, load and latency have headroom"
+        else:
+            return False
+
+        level = max(0, min(self.levels, level))
+        if level == self.level:
+            return False
+        self.level = level
+        self.reason = reason
+        return True
+
+    def has_headroom(self, budget_ms):
+        """Whether every signal is comfortably below its limit, so quality can step back up"""
+        cool = self.temperature is None or self.temperature < self.target_temp - 5.0
+        idle = self.cpu_load is None or self.cpu_load < self.max_load - 0.25
+        fast = self.latency_ms is None or self.latency_ms < 0.6 * budget_ms
+        return cool and idle and fast
+
+    def pace(self):
+        """Sleep as needed so frames are taken at no more than the target FPS"""
+        now = time.perf_counter()
+        if self.next_frame_time is None or now - self.next_frame_time > 1.0:
+            self.next_frame_time = now
+        delay = self.next_frame_time - now
+        if delay > 0:
+            time.sleep(delay)
+        self.next_frame_time += 1.0 / self.target_fps
+
+    def state(self):
+        """Current operating point and the signals behind it"""
+        return {
+            "level": self.level,
+            "target_fps": self.target_fps,
+            "detection_interval": self.detection_interval,
+            "detection_resolution": self.detection_resolution,
+            "temperature": self.temperature,
+            "cpu_load": self.cpu_load,
+            "latency_ms": self.latency_ms,
+            "reason": self.reason,
+        }
+
+    def __str__(self):
+        s = self.state()
+        return (f"level {s['level']}/{self.levels}: {s['target_fps']:.1f} FPS, detect every "
+                f"{s['detection_interval']} frames at {s['detection_resolution'] or 'full'} resolution "
+                f"({s['reason']})")
@@ -0,0 +1,52 @@
+"""
+Small image helpers shared by the detection and encoding steps.
+Boxes are (left, top, right, bottom) in pixels unless noted otherwise.
+"""
+import cv2
+import numpy as np
+
+# Padding colour YOLO uses for letterboxing
+LETTERBOX_COLOR = (114, 114, 114)
+
+
+def letterbox(image, size):
+    """Resize an image to fit a size x size square, padding the rest.
+    Returns the square image plus the (scale, pad_x, pad_y) needed to map boxes back."""
+    height, width = image.shape[:2]
+    scale = min(size / width, size / height)
+    new_width, new_height = int(round(width * scale)), int(round(height * scale))
+    resized = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
+
+    pad_x = (size - new_width) // 2
+    pad_y = (size - new_height) // 2
+    canvas = np.full((size, size, image.shape[2]), LETTERBOX_COLOR[:image.shape[2]], dtype=image.dtype)
+    canvas[pad_y:pad_y + new_height, pad_x:pad_x + new_width] = resized
+    return canvas, (scale, pad_x, pad_y)
+
+
+def unletterbox_box(box, transform, frame_shape):
+    """Map a box found in a letterboxed image back to full-frame pixels"""
+    scale, pad_x, pad_y = transform
+    height, width = frame_shape[:2]
+    left, top, right, bottom = box
+    return (
+        int(min(max(0, (left - pad_x) / scale), width - 1)),
+        int(min(max(0, (top - pad_y) / scale), height - 1)),
+        int(min(max(1, (right - pad_x) / scale), width)),
+        int(min(max(1, (bottom - pad_y) / scale), height)),
+    )
+
+
+def padded_crop(image, boxes, padding):
+    """Crop the region around one or more boxes, grown by padding x the largest box size.
+    Returns the contiguous crop and the (x, y) offset of the crop in the image."""
+    height, width = image.shape[:2]
+    left = min(box[0] for box in boxes)
+    top = min(box[1] for box in boxes)
+    right = max(box[2] for box in boxes)
+    bottom = max(box[3] for box in boxes)
+    margin = int(padding * max(max(box[2] - box[0], box[3] - box[1]) for box in boxes))
+
+    x0, y0 = max(0, left - margin), max(0, top - margin)
+    x1, y1 = min(width, right + margin), min(height, bottom + margin)
+    return np.ascontiguousarray(image[y0:y1, x0:x1]), (x0, y0)
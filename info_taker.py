@@ -4,8 +4,9 @@ import os
 from tkinter import messagebox
 
 class InfoApp:
-    def __init__(self, root):
+    def __init__(self, root, on_saved=None):
         self.root = root
+        self.on_saved = on_saved  # Called with the new name instead of starting face_data.py
         self.root.title("User Information")
         self.root.geometry("1920x1080")
         
@@ -406,6 +407,12 @@ class InfoApp:
         # Print a message confirming the save
         print(f"Information saved to {filename}")
         
+        # Hand enrolment to the supervisor when running inside it
+        if self.on_saved is not None:
+            self.root.destroy()
+            self.on_saved(user_info["name"])
+            return
+        
         # Run face_data.py
         import subprocess
         import sys
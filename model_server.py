@@ -0,0 +1,244 @@
+"""
+Warm inference daemon for the face detector and the 128-d encoder.
+The YOLO face model and the dlib models are loaded (and warmed up) once when
+the daemon starts; clients then send detection and encoding requests over a
+Unix socket. Frames are not sent through the socket: each client writes them
+into its own shared-memory buffer and the daemon reads them in place.
+
+    python model_server.py [--model /home/tusharg/yolov8n-face.pt] [--backend onnx] [--socket PATH]
+
+To have it warm at boot, start it from cron (@reboot cd <repo> && python3
+model_server.py) or a systemd unit. Clients fall back to loading the models
+themselves when the daemon isn't running.
+
+Messages are length-prefixed JSON:
+    {"op": "ping"}
+    {"op": "detect", "shm": name, "shape": [h, w, 3], "imgsz": 320}  -> {"detections": [[x1, y1, x2, y2, conf]]}
+    {"op": "locate", "shm": name, "shape": [h, w, 3]}                -> {"locations": [[top, right, bottom, left]]}
+    {"op": "encode", "shm": name, "shape": [h, w, 3], "locations": [...]} -> {"encodings": [[128 floats]]}
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+import user_events
+
+DEFAULT_MODEL_PATH = "/home/tusharg/yolov8n-face.pt"
+WARMUP_SIZES = (None, 320, 256)  # Detection resolutions compiled during warm-up
+HEADER = struct.Struct("!I")
+
+
+def default_socket_path():
+    """Stream socket of the model server, in a subdirectory so user_events never sends it datagrams"""
+    directory = user_events.runtime_dir()
+    if directory is None:
+        return "/tmp/smartmirror-models.sock"
+    directory = os.path.join(directory, "models")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    return os.path.join(directory, "models.sock")
+
+
+def send_message(sock, message):
+    payload = json.dumps(message).encode("utf-8")
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def recv_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def recv_message(sock):
+    (size,) = HEADER.unpack(recv_exactly(sock, HEADER.size))
+    return json.loads(recv_exactly(sock, size).decode("utf-8"))
+
+
+class Models:
+    def __init__(self, model_path, backend="ultralytics"):
+        """The detector and encoder, loaded once and used one request at a time"""
+        import face_recognition
+        from face_encoder import encode_faces
+        from detector_backends import create_detector
+
+        self.detector = create_detector(backend, model_path)
+        self.face_locations = face_recognition.face_locations
+        self.encode_faces = encode_faces
+        self.lock = threading.Lock()  # Neither model is safe to call from several threads at once
+
+    def detect(self, image, imgsz=None):
+        with self.lock:
+            return [list(box) for box in self.detector.detect(image, imgsz)]
+
+    def locate(self, image):
+        with self.lock:
+            return [list(location) for location in self.face_locations(image, model="hog")]
+
+    def encode(self, image, locations):
+        with self.lock:
+            return [encoding.tolist() for encoding in self.encode_faces(image, [tuple(l) for l in locations])]
+
+    def warm_up(self, resolution=(640, 480)):
+        """Run each model once so the first real request doesn't pay for lazy initialisation"""
+        start = time.perf_counter()
+        frame = np.zeros((resolution[1], resolution[0], 3), dtype=np.uint8)
+        for size in WARMUP_SIZES:
+            self.detect(frame, size)
+        self.locate(frame)
+        self.encode(frame, [(100, 300, 300, 100)])
+        print(f"[INFO] Models warmed up in {time.perf_counter() - start:.2f} seconds")
+
+
+class RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        buffers = {}  # Shared-memory segments of this client, attached once
+        try:
+            while True:
+                try:
+                    request = recv_message(self.request)
+                except ConnectionError:
+                    break
+                try:
+                    send_message(self.request, self.dispatch(request, buffers))
+                except Exception as e:
+                    send_message(self.request, {"error": str(e)})
+        finally:
+            for buffer in buffers.values():
+                buffer.close()
+
+    def frame(self, request, buffers):
+        """View the client's shared-memory frame without copying it"""
+        name = request["shm"]
+        if name not in buffers:
+            # A new name means the client outgrew its old buffer, which can be let go
+            for buffer in buffers.values():
+                buffer.close()
+            buffers.clear()
+            buffers[name] = shared_memory.SharedMemory(name=name)
+            # The client owns the segment; stop this process's tracker from unlinking it
+            resource_tracker.unregister(buffers[name]._name, "shared_memory")
+        return np.ndarray(request["shape"], dtype=np.uint8, buffer=buffers[name].buf)
+
+    def dispatch(self, request, buffers):
+        models = self.server.models
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True, "uptime": time.time() - self.server.started}
+        if op == "detect":
+            return {"detections": models.detect(self.frame(request, buffers), request.get("imgsz"))}
+        if op == "locate":
+            return {"locations": models.locate(self.frame(request, buffers))}
+        if op == "encode":
+            return {"encodings": models.encode(self.frame(request, buffers), request["locations"])}
+        raise ValueError(f"Unknown op {op!r}")
+
+
+class ModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, models):
+        self.models = models
+        self.started = time.time()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # Left behind by a daemon that didn't shut down cleanly
+        super().__init__(socket_path, RequestHandler)
+
+
+class ModelClient:
+    def __init__(self, socket_path=None, timeout=10.0):
+        """Connection to the model daemon; raises OSError if it isn't running"""
+        self.socket_path = socket_path or default_socket_path()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(self.socket_path)
+        self.buffer = None
+        self.lock = threading.RLock()
+        self.request({"op": "ping"})
+
+    @classmethod
+    def connect(cls, socket_path=None):
+        """Return a client if the daemon answers, otherwise None"""
+        try:
+            return cls(socket_path)
+        except (OSError, ConnectionError):
+            return None
+
+    def request(self, message):
+        with self.lock:
+            send_message(self.sock, message)
+            reply = recv_message(self.sock)
+        if "error" in reply:
+            raise RuntimeError(f"Model server: {reply['error']}")
+        return reply
+
+    def request_with_frame(self, image, message):
+        """Place a frame in the shared buffer (growing it if needed) and send a request about it"""
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        with self.lock:
+            if self.buffer is None or self.buffer.size < image.nbytes:
+                if self.buffer is not None:
+                    self.buffer.close()
+                    self.buffer.unlink()
+                self.buffer = shared_memory.SharedMemory(create=True, size=image.nbytes)
+            np.ndarray(image.shape, dtype=np.uint8, buffer=self.buffer.buf)[...] = image
+            return self.request(dict(message, shm=self.buffer.name, shape=list(image.shape)))
+
+    def detect(self, image, imgsz=None):
+        """YOLO boxes as (x1, y1, x2, y2, conf) in image coordinates"""
+        reply = self.request_with_frame(image, {"op": "detect", "imgsz": imgsz})
+        return [tuple(detection) for detection in reply["detections"]]
+
+    def locate(self, image):
+        """HOG face locations as (top, right, bottom, left)"""
+        reply = self.request_with_frame(image, {"op": "locate"})
+        return [tuple(location) for location in reply["locations"]]
+
+    def encode(self, image, locations):
+        """128-d encodings for (top, right, bottom, left) locations in an RGB image"""
+        reply = self.request_with_frame(image, {"op": "encode", "locations": [list(l) for l in locations]})
+        return [np.array(encoding) for encoding in reply["encodings"]]
+
+    def close(self):
+        self.sock.close()
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer.unlink()
+            self.buffer = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm face detection and encoding server")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="YOLO face model")
+    parser.add_argument("--backend", default="ultralytics", help="ultralytics, onnx or onnx-int8")
+    parser.add_argument("--socket", default=None, help="Unix socket path (default: runtime directory)")
+    args = parser.parse_args()
+
+    print("[INFO] Loading models...")
+    models = Models(args.model, args.backend)
+    models.warm_up()
+
+    socket_path = args.socket or default_socket_path()
+    server = ModelServer(socket_path, models)
+    print(f"[INFO] Model server listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("[INFO] Model server stopped")
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    main()
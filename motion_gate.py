@@ -0,0 +1,105 @@
+"""
+Background-difference motion gate in front of face detection.
+Each downsampled frame is compared with a running-average background that
+absorbs changes over `background_time` seconds, so slow movement (someone
+walking up to the mirror) builds up instead of being lost between two nearly
+identical frames, at any frame rate. Inference is switched on when enough
+pixels differ from the background and switched off again only after the scene
+has been quiet for a while (hysteresis). A heartbeat still lets a frame through every
+few seconds so somebody standing perfectly still is not missed.
+"""
+import time
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    def __init__(self, pixel_delta=15, on_fraction=0.02, off_fraction=0.005, hold_frames=30, heartbeat=5.0,
+                 background_time=2.0):
+        self.pixel_delta = pixel_delta      # Per-pixel change (0-255) that counts as motion
+        self.on_fraction = on_fraction      # Fraction of moving pixels that opens the gate
+        self.off_fraction = off_fraction    # Below this the scene counts as quiet
+        self.hold_frames = hold_frames      # Quiet frames needed before the gate closes
+        self.heartbeat = heartbeat          # Seconds between forced inference frames while closed
+        self.background_time = background_time  # Seconds for the background to take in a change
+
+        self.background = None              # float32 running average of the thumbnails
+        self.active = True
+        self.quiet_frames = 0
+        self.last_pass = 0.0
+        self.motion = 0.0
+        self.heartbeat_pass = False         # Whether the last frame let through was a heartbeat
+
+        # Time accounting for gated vs active operation
+        self.last_update = None
+        self.active_seconds = 0.0
+        self.gated_seconds = 0.0
+        self.active_frames = 0
+        self.gated_frames = 0
+        self.heartbeat_frames = 0
+
+    def update(self, thumbnail, now=None):
+        """Feed a small grayscale frame; return True if inference should run on it"""
+        now = time.time() if now is None else now
+        elapsed = 0.0
+        if self.last_update is not None:
+            # Attribute the time since the previous frame to the state we were in
+            elapsed = now - self.last_update
+            if self.active:
+                self.active_seconds += elapsed
+            else:
+                self.gated_seconds += elapsed
+        self.last_update = now
+
+        if self.background is None:
+            self.background = thumbnail.astype(np.float32)
+        else:
+            changed = cv2.absdiff(thumbnail.astype(np.float32), self.background) > self.pixel_delta
+            self.motion = float(np.count_nonzero(changed)) / changed.size
+            # Blend the frame in by how much time passed, so the gate behaves the same at any frame rate
+            alpha = 1.0 - np.exp(-max(elapsed, 0.0) / self.background_time)
+            cv2.accumulateWeighted(thumbnail, self.background, float(alpha))
+
+        # Hysteresis: open quickly on motion, close only after a quiet spell
+        if self.motion >= self.on_fraction:
+            self.active = True
+            self.quiet_frames = 0
+        elif self.motion < self.off_fraction:
+            self.quiet_frames += 1
+            if self.quiet_frames >= self.hold_frames:
+                self.active = False
+
+        self.heartbeat_pass = False
+        if self.active:
+            self.active_frames += 1
+            self.last_pass = now
+            return True
+
+        if now - self.last_pass >= self.heartbeat:
+            self.heartbeat_frames += 1
+            self.last_pass = now
+            self.heartbeat_pass = True
+            return True
+
+        self.gated_frames += 1
+        return False
+
+    def summary(self):
+        """Time and frames spent gated versus active"""
+        total = self.active_seconds + self.gated_seconds
+        return {
+            "active": self.active,
+            "motion": self.motion,
+            "active_seconds": self.active_seconds,
+            "gated_seconds": self.gated_seconds,
+            "gated_time_fraction": self.gated_seconds / total if total > 0 else 0.0,
+            "active_frames": self.active_frames,
+            "gated_frames": self.gated_frames,
+            "heartbeat_frames": self.heartbeat_frames,
+        }
+
+    def __str__(self):
+        s = self.summary()
+        return (f"gated {s['gated_time_fraction'] * 100:.0f}% of the time "
+                f"({s['gated_frames']} frames skipped, {s['active_frames']} active, "
+                f"{s['heartbeat_frames']} heartbeats)")
@@ -0,0 +1,90 @@
+"""
+Warms the dashboard caches before anyone is recognised.
+The news categories and stock tickers of every profile in people.json are
+refreshed on a schedule, and a single profile is refreshed straight away when
+the recognizer announces a face it thinks is that person but hasn't confirmed
+yet ("candidate" events). The fetches run on the fetch engine and land in the
+same caches the dashboard reads, so its panels are already filled when the
+confirmed user arrives.
+"""
+import asyncio
+import json
+import time
+
+from fetch_engine import get_engine
+
+PREFETCH_INTERVAL = 300     # Seconds between scheduled prefetches of every profile
+CANDIDATE_COOLDOWN = 30     # Seconds before the same candidate triggers another prefetch
+
+
+class Prefetcher:
+    def __init__(self, warm_news, warm_quotes, people_file="people.json", interval=PREFETCH_INTERVAL, report=None):
+        self.warm_news = warm_news      # callable(categories), schedules a refresh and returns
+        self.warm_quotes = warm_quotes  # callable(tickers), schedules a refresh and returns
+        self.report = report            # callable() -> cache statistics, logged once per scheduled run
+        self.people_file = people_file
+        self.interval = interval
+        self.engine = get_engine()
+        self.task = None
+        self.last_candidate = {}        # name -> time of its last prefetch
+
+        self.runs = 0
+        self.candidates = 0
+
+    def load_profiles(self):
+        try:
+            with open(self.people_file, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            print(f"[WARNING] Prefetch could not read {self.people_file}: {e}")
+            return []
+
+    def prefetch(self, people):
+        """Schedule a refresh of the news categories and tickers of the given profiles"""
+        categories = list(dict.fromkeys(category for person in people if person.get("news_interest")
+                                        for category in person.get("news_categories", [])))
+        tickers = list(dict.fromkeys(ticker.upper() for person in people if person.get("stock_interest")
+                                     for ticker in person.get("stock_tickers", [])))
+        if categories:
+            self.warm_news(categories)
+        if tickers:
+            self.warm_quotes(tickers)
+        self.runs += 1
+
+    def prefetch_all(self):
+        self.prefetch(self.load_profiles())
+
+    def on_candidate(self, name):
+        """Prefetch a likely but unconfirmed user's data; returns whether a prefetch was started"""
+        now = time.time()
+        if not name or now - self.last_candidate.get(name, 0) < CANDIDATE_COOLDOWN:
+            return False
+        self.last_candidate[name] = now
+
+        people = [person for person in self.load_profiles() if person["name"].lower() == name.lower()]
+        if not people:
+            return False
+        print(f"[PREFETCH] Warming dashboard data for candidate {name}")
+        self.candidates += 1
+        self.prefetch(people)
+        return True
+
+    async def schedule(self):
+        while True:
+            await asyncio.to_thread(self.prefetch_all)
+            if self.report is not None:
+                print(f"[INFO] {self} - {self.report()}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Prefetch every profile now and then every interval, on the fetch engine"""
+        if self.task is None:
+            self.task = self.engine.run(self.schedule())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def __str__(self):
+        return f"{self.runs} prefetches, {self.candidates} for candidates"
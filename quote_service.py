@@ -0,0 +1,141 @@
+"""
+Shared stock quote service for the dashboard.
+Quotes are cached per ticker with their own fetch time. When any requested
+ticker is stale, every stale ticker of every loaded profile is fetched in one
+batched upstream call; callers asking for tickers that are already being
+fetched wait for that call instead of starting another one. The sample quotes
+are only used for tickers that have never been fetched successfully.
+
+The upstream is any callable taking a list of tickers and returning
+{ticker: quote}; set SMARTMIRROR_QUOTES=sample to use a local stand-in.
+"""
+import os
+import random
+import threading
+import time
+
+from data_cache import DataCache
+from startup import lazy_import
+
+yf = lazy_import("yfinance")
+
+QUOTE_TTL = 60          # Seconds before a quote is fetched again
+FETCH_TIMEOUT = 15      # Seconds a caller waits for a fetch started by someone else
+
+
+def format_quote(price, previous_close, currency="USD", name=None):
+    """Quote dict in the format the dashboard displays"""
+    change = price - previous_close
+    percent_change = (change / previous_close) * 100 if previous_close else 0
+    quote = {
+        "price": f"{price:.2f}",
+        "change": f"{change:.2f}",
+        "percent": f"{percent_change:.2f}%",
+        "currency": currency,
+    }
+    if name:
+        quote["name"] = name
+    return quote
+
+
+def yfinance_upstream(tickers):
+    """Last close and previous close of all tickers in one yfinance download"""
+    data = yf.download(tickers, period="5d", interval="1d", group_by="ticker",
+                       progress=False, threads=False, auto_adjust=False)
+    quotes = {}
+    for ticker in tickers:
+        try:
+            closes = data[ticker]["Close"] if data.columns.nlevels > 1 else data["Close"]
+        except KeyError:
+            continue
+        closes = closes.dropna()
+        if len(closes) == 0:
+            continue
+        price = float(closes.iloc[-1])
+        previous_close = float(closes.iloc[-2]) if len(closes) > 1 else price
+        quotes[ticker] = format_quote(price, previous_close)
+    return quotes
+
+
+def sample_upstream(tickers):
+    """Local stand-in: deterministic per ticker, drifting a little over time"""
+    quotes = {}
+    for ticker in tickers:
+        rng = random.Random(f"{ticker}-{int(time.time() // QUOTE_TTL)}")
+        base = 50 + random.Random(ticker).random() * 400
+        quotes[ticker] = format_quote(base * (1 + rng.uniform(-0.02, 0.02)), base)
+    return quotes
+
+
+class QuoteService:
+    def __init__(self, upstream=None, fallback=None, ttl=QUOTE_TTL):
+        if upstream is None:
+            upstream = sample_upstream if os.environ.get("SMARTMIRROR_QUOTES") == "sample" else yfinance_upstream
+        self.upstream = upstream
+        self.fallback = fallback or {}   # Sample quotes for tickers never fetched
+        self.cache = DataCache(ttl, name="quotes")
+        self.watched = set()             # Tickers of every loaded profile
+        self.lock = threading.Lock()
+        self.batches = 0
+
+    def watch(self, tickers):
+        """Add tickers to the set refreshed together in each batch"""
+        with self.lock:
+            self.watched.update(ticker.upper() for ticker in tickers)
+
+    def watch_profiles(self, people):
+        self.watch(ticker for person in people if person.get("stock_interest")
+                   for ticker in person.get("stock_tickers", []))
+
+    def refresh(self, tickers=()):
+        """Fetch every stale watched ticker (plus the given ones) in one upstream call"""
+        with self.lock:
+            wanted = list(dict.fromkeys(list(tickers) + sorted(self.watched)))
+        claimed = self.cache.begin_refresh(self.cache.stale_keys(wanted))
+        if not claimed:
+            return
+        try:
+            self.batches += 1
+            self.cache.put_many(self.upstream(claimed))
+        except Exception as e:
+            print(f"[WARNING] Quote fetch failed for {', '.join(claimed)}: {e}")
+        finally:
+            self.cache.end_refresh(claimed)
+
+    def get_quotes(self, tickers):
+        """Quotes for the tickers, fetching stale ones first; blocks while a fetch is running"""
+        tickers = [ticker.upper() for ticker in tickers]
+        if self.cache.stale_keys(tickers):
+            self.refresh(tickers)
+            # Tickers another caller was already fetching: wait for that call to finish
+            self.cache.wait_for(tickers, timeout=FETCH_TIMEOUT)
+
+        quotes = {}
+        for ticker in tickers:
+            quote = self.cache.get(ticker)
+            if quote is None:
+                quote = self.fallback.get(ticker, {"price": "N/A", "change": "0.00", "percent": "0.00%",
+                                                   "name": ticker, "currency": "USD"})
+            quotes[ticker] = quote
+        return quotes
+
+    def cached_quotes(self, tickers):
+        """Quotes already in the cache (fresh or stale), without fetching or falling back"""
+        quotes = {ticker: self.cache.peek(ticker.upper()) for ticker in tickers}
+        return {ticker: quote for ticker, quote in quotes.items() if quote is not None}
+
+    def peek_quotes(self, tickers):
+        """Whatever is cached for the tickers (sample data for the rest), without fetching"""
+        return {ticker: self.cache.peek(ticker.upper()) or self.fallback.get(
+                    ticker.upper(), {"price": "N/A", "change": "0.00", "percent": "0.00%",
+                                     "name": ticker, "currency": "USD"})
+                for ticker in tickers}
+
+    def fetched(self, tickers):
+        """Fetch time of the oldest cached quote among the tickers, or None if none is cached"""
+        times = [self.cache.fetched(ticker.upper()) for ticker in tickers]
+        times = [fetched for fetched in times if fetched is not None]
+        return min(times) if times else None
+
+    def __str__(self):
+        return f"{self.cache} in {self.batches} batched fetches"
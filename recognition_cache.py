@@ -0,0 +1,125 @@
+"""
+Short-lived cache of recognition results.
+Two levels, both with a TTL and LRU eviction:
+  - per track ID, the last K (name, confidence) observations; the identity shown
+    is the majority vote over them, so a single odd frame can't flip a name
+  - per recently seen face, its int8-quantized embedding and gallery match; a new
+    encoding close enough to one of them reuses the match instead of searching
+    the gallery (the scan covers at most `capacity` small rows, not the gallery).
+    A match is only reused when it is clear of the recognition threshold by more
+    than the new face could differ from it, so a hit never flips known/unknown
+"""
+import time
+from collections import Counter, OrderedDict, deque
+import numpy as np
+
+
+class LRUCache:
+    def __init__(self, capacity, ttl):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.entries = OrderedDict()   # key -> (stored at, value)
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, now=None):
+        now = time.time() if now is None else now
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if now - entry[0] > self.ttl:
+            del self.entries[key]
+            self.expirations += 1
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key, value, now=None):
+        self.entries[key] = (time.time() if now is None else now, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class RecognitionCache:
+    def __init__(self, ttl=10.0, capacity=128, votes=5, quantization=0.004, verify_distance=0.2, threshold=0.55):
+        self.votes = votes                      # Observations per track the vote is taken over
+        self.quantization = quantization        # int8 step for stored embeddings (+-0.5 range at 0.004)
+        self.verify_distance = verify_distance  # Max distance to a cached embedding for a hit
+        self.threshold = threshold              # Recognition threshold the cached distances are judged by
+        self.tracks = LRUCache(capacity, ttl)
+        self.embeddings = LRUCache(capacity, ttl)
+        self.next_key = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.near_threshold = 0  # Close enough, but too near the threshold to trust the cached distance
+        self.overruled = 0  # Observations the vote did not follow
+
+    def quantize(self, encoding):
+        return np.clip(np.round(np.asarray(encoding) / self.quantization), -127, 127).astype(np.int8)
+
+    def lookup(self, encoding):
+        """Cached (name, distance) for a face close to one seen recently, or None"""
+        now = time.time()
+        keys = [key for key, (stored, _) in self.embeddings.entries.items() if now - stored <= self.embeddings.ttl]
+        if keys:
+            cached = np.stack([self.embeddings.entries[key][1][0] for key in keys]).astype(np.float32)
+            distances = np.linalg.norm(cached * self.quantization - np.asarray(encoding, dtype=np.float32), axis=1)
+            nearest = int(np.argmin(distances))
+            if distances[nearest] <= self.verify_distance:
+                # The new face's gallery distance is within this much of the cached one
+                # (triangle inequality, plus the worst-case quantization error)
+                uncertainty = distances[nearest] + self.quantization / 2 * np.sqrt(cached.shape[1])
+                _, name, distance = self.embeddings.entries[keys[nearest]][1]
+                if abs(distance - self.threshold) > uncertainty:
+                    self.embeddings.get(keys[nearest], now)
+                    self.hits += 1
+                    return name, distance
+                self.near_threshold += 1
+        self.misses += 1
+        return None
+
+    def store(self, encoding, name, distance):
+        self.embeddings.put(self.next_key, (self.quantize(encoding), name, distance))
+        self.next_key += 1
+
+    def vote(self, track_id, name, confidence):
+        """Add an observation for a track and return its (name, confidence) by majority vote"""
+        history = self.tracks.get(track_id)
+        if history is None:
+            history = deque(maxlen=self.votes)
+        history.append((name, confidence))
+        self.tracks.put(track_id, history)
+
+        # Most votes wins; ties go to the name seen most recently
+        counts = Counter(observed for observed, _ in history)
+        best = max(counts.values())
+        winner = next(observed for observed, _ in reversed(history) if counts[observed] == best)
+        if winner != name:
+            self.overruled += 1
+        confidences = [c for observed, c in history if observed == winner]
+        return winner, sum(confidences) / len(confidences)
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "overruled": self.overruled,
+            "near_threshold": self.near_threshold,
+            "embeddings": len(self.embeddings),
+            "tracks": len(self.tracks),
+            "evictions": self.embeddings.evictions + self.tracks.evictions,
+            "expirations": self.embeddings.expirations + self.tracks.expirations,
+        }
+
+    def __str__(self):
+        s = self.summary()
+        return (f"{s['hits']} hits / {s['misses']} misses ({s['hit_rate'] * 100:.0f}%), "
+                f"{s['overruled']} flickering identities overruled")
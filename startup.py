@@ -0,0 +1,207 @@
+"""
+Startup-time helpers: deferred imports and a cold-start profiler/benchmark.
+
+lazy_import("yfinance") returns a stand-in module that performs the real
+import the first time one of its attributes is used, so a feature's heavy
+dependency is only paid for when the feature runs.
+
+    python startup.py profile [--output startup_profile.json]
+    python startup.py record  [--baseline startup_baseline.json]
+    python startup.py check   [--baseline startup_baseline.json] [--tolerance 0.2]
+
+profile imports each entry point in a fresh interpreter with -X importtime and
+reports the slowest modules; record saves the cold-start times as a baseline;
+check exits non-zero if any entry point got slower than the baseline allows.
+
+Import time alone would hide whatever the lazy imports defer, so profile,
+record and check also time the recognizer to ready: a fresh interpreter that
+loads the gallery and models and processes its first frame (--ready-source,
+a one-frame synthetic source by default; --no-ready skips it).
+"""
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import types
+
+# Entry points whose cold start is profiled and benchmarked
+ENTRY_POINTS = ["supervisor", "Face_recog_Gui", "display_info", "info_taker", "face_data", "face_encoding"]
+RUNS = 3  # Cold starts per entry point; the fastest one is kept
+READY_RUNS = 2  # Recognizer time-to-ready runs (each loads every model); the fastest one is kept
+READY_ENTRY = "recognizer_ready"  # Baseline key of the time-to-ready measurement
+
+# Started in a fresh interpreter: build the recognizer (models loaded locally, never the
+# warm model server) and process one frame, which also resolves the deferred imports
+READY_SCRIPT = """
+import sys
+from Face_recog_Gui import CONFIG, FaceRecognitionSystem
+config = dict(CONFIG, frame_source=sys.argv[1], realtime=False, enable_logging=False,
+              launch_dashboard=False, show_preview=False, model_server=False)
+system = FaceRecognitionSystem(config)
+system.analyze_frame(system.source.read())
+print("READY")
+"""
+
+# Seconds spent resolving each lazy import, filled in as features first use them
+deferred_imports = {}
+
+
+class LazyModule(types.ModuleType):
+    def __init__(self, name):
+        """Module stand-in that imports the real module on first attribute access"""
+        super().__init__(name)
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                start = time.perf_counter()
+                self._module = importlib.import_module(self.__name__)
+                deferred_imports[self.__name__] = time.perf_counter() - start
+                print(f"[STARTUP] Imported {self.__name__} on first use in "
+                      f"{deferred_imports[self.__name__] * 1000:.0f} ms")
+        return self._module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+
+def lazy_import(name):
+    """Return the module if it is already loaded, otherwise a LazyModule for it"""
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
+
+def parse_importtime(stderr):
+    """Parse -X importtime output into {module: (self_us, cumulative_us)}"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def cold_start(entry_point, importtime=False):
+    """Import an entry point in a fresh interpreter; returns (wall seconds, importtime output)"""
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", f"import {entry_point}"]
+    start = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"import {entry_point} failed: {result.stderr.strip().splitlines()[-1:]}")
+    return elapsed, result.stderr
+
+
+def time_to_ready(source="synthetic:1"):
+    """Seconds from starting a fresh interpreter until the recognizer has processed its first frame"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", READY_SCRIPT, source], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0 or "READY" not in result.stdout:
+        output = (result.stderr.strip() or result.stdout.strip()).splitlines()[-1:]
+        raise RuntimeError(f"recognizer never got ready: {output}")
+    return elapsed
+
+
+def profile_entry_point(entry_point, top=15):
+    """Cold-start time of an entry point and the modules that dominate it"""
+    seconds = min(cold_start(entry_point)[0] for _ in range(RUNS))
+    modules = parse_importtime(cold_start(entry_point, importtime=True)[1])
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        "cold_start_seconds": seconds,
+        "modules_imported": len(modules),
+        "slowest_modules": [{"module": name, "self_ms": self_us / 1000, "cumulative_ms": cumulative_us / 1000}
+                            for name, (self_us, cumulative_us) in slowest],
+    }
+
+
+def profile(entry_points=ENTRY_POINTS, ready_source="synthetic:1"):
+    results = {}
+    for entry_point in entry_points:
+        try:
+            results[entry_point] = profile_entry_point(entry_point)
+            print(f"[INFO] {entry_point}: {results[entry_point]['cold_start_seconds'] * 1000:.0f} ms cold start")
+        except RuntimeError as e:
+            print(f"[ERROR] {e}")
+
+    if ready_source:
+        try:
+            seconds = min(time_to_ready(ready_source) for _ in range(READY_RUNS))
+            results[READY_ENTRY] = {"ready_seconds": seconds, "source": ready_source}
+            print(f"[INFO] recognizer ready (models loaded, first frame processed) in {seconds:.2f} s")
+        except RuntimeError as e:
+            print(f"[ERROR] {e}")
+    return results
+
+
+def check(baseline_path, tolerance, entry_points=ENTRY_POINTS, ready_source="synthetic:1"):
+    """Compare cold starts and time-to-ready against a recorded baseline; returns True if none regressed"""
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+
+    passed = True
+    for entry_point in entry_points:
+        if entry_point not in baseline:
+            continue
+        seconds = min(cold_start(entry_point)[0] for _ in range(RUNS))
+        limit = baseline[entry_point]["cold_start_seconds"] * (1 + tolerance)
+        status = "OK" if seconds <= limit else "SLOWER"
+        passed = passed and seconds <= limit
+        print(f"[{status}] {entry_point}: {seconds * 1000:.0f} ms (limit {limit * 1000:.0f} ms)")
+
+    # The number that matters: how long until the mirror can actually recognise someone
+    if ready_source and READY_ENTRY in baseline:
+        limit = baseline[READY_ENTRY]["ready_seconds"] * (1 + tolerance)
+        try:
+            seconds = min(time_to_ready(ready_source) for _ in range(READY_RUNS))
+        except RuntimeError as e:
+            print(f"[ERROR] {e}")
+            return False
+        status = "OK" if seconds <= limit else "SLOWER"
+        passed = passed and seconds <= limit
+        print(f"[{status}] {READY_ENTRY}: {seconds:.2f} s (limit {limit:.2f} s)")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup profiling and cold-start benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    profile_cmd = commands.add_parser("profile", help="import-time profile of each entry point")
+    profile_cmd.add_argument("--output", default="startup_profile.json")
+    record = commands.add_parser("record", help="save cold-start times as the baseline")
+    record.add_argument("--baseline", default="startup_baseline.json")
+    check_cmd = commands.add_parser("check", help="fail if cold start got slower than the baseline")
+    check_cmd.add_argument("--baseline", default="startup_baseline.json")
+    check_cmd.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    for command in (profile_cmd, record, check_cmd):
+        command.add_argument("--entry-points", type=lambda s: s.split(","), default=ENTRY_POINTS)
+        command.add_argument("--ready-source", default="synthetic:1",
+                             help="frame source the recognizer's time to ready is measured with")
+        command.add_argument("--no-ready", dest="ready_source", action="store_const", const=None,
+                             help="only time the imports")
+    args = parser.parse_args()
+
+    if args.command == "check":
+        sys.exit(0 if check(args.baseline, args.tolerance, args.entry_points, args.ready_source) else 1)
+
+    results = profile(args.entry_points, args.ready_source)
+    output = args.output if args.command == "profile" else args.baseline
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"[INFO] Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Single long-lived entry point for the smart mirror.
+The recognizer runs on a background thread with its models loaded once, the
+dashboard lives in the Tk main loop and is shown or hidden as people come and
+go, and enrolment (form, photo capture and encoding) runs inside the same
+process. Nothing is handed over by starting a new interpreter. While the
+dashboard is hidden its prefetcher keeps everyone's news and stocks warm,
+and fetches a person's data early when the recognizer names a candidate.
+
+    python supervisor.py [--source picamera] [--enroll]
+
+Keys on the dashboard: Escape hides it, Ctrl+N enrols a new user, Ctrl+Q quits.
+"""
+import argparse
+import os
+import threading
+import customtkinter as ctk
+
+import face_data
+from display_info import DashboardApp
+from info_taker import InfoApp
+from face_gallery import gallery_exists
+from Face_recog_Gui import CONFIG, FaceRecognitionSystem
+
+
+class Supervisor:
+    def __init__(self, config):
+        # The recognizer hands over through on_user_change and never opens its own windows
+        self.config = dict(config, launch_dashboard=False, show_preview=False)
+        self.recognizer = None
+        self.recognizer_thread = None
+        self.enrolment_thread = None
+        self.lock = threading.Lock()
+
+        self.root = ctk.CTk()
+        self.dashboard = DashboardApp(self.root, local_events=True)
+        self.root.withdraw()  # Hidden until somebody is recognised
+        self.root.bind("<Escape>", lambda event: self.hide_dashboard())
+        self.root.bind("<Control-n>", lambda event: self.open_enrolment())
+        self.root.bind("<Control-q>", lambda event: self.root.quit())
+        self.root.protocol("WM_DELETE_WINDOW", self.root.quit)
+
+    def has_gallery(self):
+        return gallery_exists(self.config["gallery_file"]) or os.path.exists(self.config["encodings_file"])
+
+    def on_user_change(self, name, confidence):
+        """Recognizer thread callback: bring the dashboard up on the Tk thread"""
+        self.root.after(0, self.show_dashboard)
+
+    def show_dashboard(self):
+        self.root.deiconify()
+        self.root.lift()
+
+    def hide_dashboard(self):
+        self.root.withdraw()
+        # Forget the last person so the dashboard reappears when they are seen again
+        if self.recognizer is not None:
+            self.recognizer.currentname = "unknown"
+
+    def start_recognizer(self):
+        """Start (or restart) the recognition loop; models are only loaded the first time"""
+        with self.lock:
+            if self.recognizer_thread is not None and self.recognizer_thread.is_alive():
+                return
+            if self.recognizer is None:
+                self.recognizer = FaceRecognitionSystem(self.config, on_user_change=self.on_user_change)
+            else:
+                self.recognizer.setup_camera()
+            self.recognizer_thread = threading.Thread(target=self.recognizer.run, name="recognizer", daemon=True)
+            self.recognizer_thread.start()
+
+    def stop_recognizer(self):
+        """Stop the recognition loop and release the camera, keeping the models loaded"""
+        with self.lock:
+            if self.recognizer_thread is None:
+                return
+            self.recognizer.stop()
+            self.recognizer_thread.join()
+            self.recognizer_thread = None
+
+    def open_enrolment(self):
+        """Show the user information form; saving it starts enrolment in this process"""
+        if self.enrolment_thread is not None and self.enrolment_thread.is_alive():
+            print("[INFO] Enrolment already in progress")
+            return
+        window = ctk.CTkToplevel(self.root)
+        InfoApp(window, on_saved=self.start_enrolment)
+
+    def start_enrolment(self, name):
+        self.hide_dashboard()
+        self.enrolment_thread = threading.Thread(target=self.enrol, args=(name,), name="enrolment", daemon=True)
+        self.enrolment_thread.start()
+
+    def enrol(self, name):
+        """Enrolment worker: capture photos, update the gallery and reload it into the recognizer"""
+        # The camera can only be opened once, so recognition pauses while photos are taken
+        self.stop_recognizer()
+        try:
+            if face_data.enroll(name, self.config["frame_source"], show_window=False) and self.recognizer is not None:
+                self.recognizer.load_encodings()
+        except Exception as e:
+            print(f"[ERROR] Enrolment failed: {e}")
+        # The new profile's news and stocks are fetched before they are first recognised
+        self.dashboard.prefetcher.prefetch_all()
+        if self.has_gallery():
+            self.start_recognizer()
+
+    def run(self, enrol_first=False):
+        if enrol_first or not self.has_gallery():
+            print("[INFO] No gallery yet, starting with enrolment" if not self.has_gallery() else
+                  "[INFO] Starting with enrolment")
+            self.open_enrolment()
+        else:
+            self.start_recognizer()
+
+        try:
+            self.root.mainloop()
+        finally:
+            self.stop_recognizer()
+            self.dashboard.prefetcher.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Smart mirror supervisor")
+    parser.add_argument("--source", default=CONFIG["frame_source"],
+                        help="picamera, dir:<path>, video:<path> or synthetic[:<n>]")
+    parser.add_argument("--enroll", action="store_true", help="open the enrolment form on start")
+    args = parser.parse_args()
+    CONFIG["frame_source"] = args.source
+
+    Supervisor(CONFIG).run(enrol_first=args.enroll)
@@ -0,0 +1,159 @@
+"""
+In-process and cross-process publish/subscribe for recognition events.
+Events are small dicts such as
+    {"type": "user", "name": "alice", "confidence": 0.71, "timestamp": 1712345678.9}
+and are delivered
+  - to callbacks registered in the same process with subscribe(), and
+  - to every Subscriber in other processes over Unix-domain datagram sockets
+    that live in a runtime directory (XDG_RUNTIME_DIR or /dev/shm).
+The last event is also kept in that RAM-backed directory so a dashboard that
+starts later can pick up the current user without touching the SD card.
+"""
+import errno
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+
+MAX_EVENT_BYTES = 4096
+
+_local_callbacks = []
+_local_lock = threading.Lock()
+
+
+def runtime_dir():
+    """RAM-backed directory for sockets and the last event, or None if there isn't one"""
+    for base in (os.environ.get("XDG_RUNTIME_DIR"), "/dev/shm"):
+        if base and os.path.isdir(base) and os.access(base, os.W_OK):
+            path = os.path.join(base, "smartmirror")
+            os.makedirs(path, exist_ok=True)
+            return path
+    return None
+
+
+def subscribe(callback):
+    """Call callback(event) for every event published in this process"""
+    with _local_lock:
+        _local_callbacks.append(callback)
+
+
+def unsubscribe(callback):
+    with _local_lock:
+        if callback in _local_callbacks:
+            _local_callbacks.remove(callback)
+
+
+def make_event(event_type, **fields):
+    return dict(fields, type=event_type, timestamp=time.time())
+
+
+def publish(event):
+    """Deliver an event to local callbacks and socket subscribers; returns how many received it"""
+    directory = runtime_dir()
+    if directory is not None:
+        # Remember the latest event of each type for late subscribers (tmpfs, not the SD card).
+        # Written first, so anyone handling the event and reading last_event() sees this one
+        state_path = os.path.join(directory, f"last_{event['type']}.json")
+        with open(state_path + ".tmp", "w") as f:
+            json.dump(event, f)
+        os.replace(state_path + ".tmp", state_path)
+
+    delivered = 0
+    with _local_lock:
+        callbacks = list(_local_callbacks)
+    for callback in callbacks:
+        try:
+            callback(event)
+            delivered += 1
+        except Exception as e:
+            print(f"[WARNING] Event callback failed: {e}")
+
+    if directory is None or not hasattr(socket, "AF_UNIX"):
+        return delivered
+
+    payload = json.dumps(event).encode("utf-8")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+        sender.setblocking(False)
+        for entry in os.listdir(directory):
+            if not entry.endswith(".sock"):
+                continue
+            path = os.path.join(directory, entry)
+            try:
+                sender.sendto(payload, path)
+                delivered += 1
+            except BlockingIOError:
+                # Subscriber isn't keeping up; it will still see the last event file
+                pass
+            except OSError as e:
+                if e.errno in (errno.ECONNREFUSED, errno.ENOENT):
+                    # Subscriber went away without cleaning up
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                else:
+                    # Not a subscriber (or a broken one); never let it block the others
+                    print(f"[WARNING] Could not deliver event to {path}: {e}")
+    return delivered
+
+
+def last_event(event_type):
+    """Most recent event of a type published on this machine, or None"""
+    directory = runtime_dir()
+    if directory is None:
+        return None
+    try:
+        with open(os.path.join(directory, f"last_{event_type}.json"), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+class Subscriber:
+    def __init__(self, name="subscriber"):
+        """Bind a datagram socket in the runtime directory; raises OSError if that isn't possible"""
+        directory = runtime_dir()
+        if directory is None or not hasattr(socket, "AF_UNIX"):
+            raise OSError("No runtime directory for event sockets")
+
+        fd, self.path = tempfile.mkstemp(prefix=f"{name}-{os.getpid()}-", suffix=".sock", dir=directory)
+        os.close(fd)
+        os.unlink(self.path)
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.socket.bind(self.path)
+        self.thread = None
+
+    def receive(self, timeout=None):
+        """Block until the next event arrives (or the timeout passes, returning None)"""
+        self.socket.settimeout(timeout)
+        try:
+            data = self.socket.recv(MAX_EVENT_BYTES)
+        except socket.timeout:
+            return None
+        try:
+            return json.loads(data.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return None
+
+    def listen(self, callback):
+        """Call callback(event) from a background thread for every event received"""
+        def run():
+            while True:
+                try:
+                    event = self.receive()
+                except OSError:
+                    break  # Socket closed
+                if event is not None:
+                    callback(event)
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.socket.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass